@@ -39,3 +39,7 @@ endfunction
 function! netranger#api#registerHookerVimFn(hooker, fn)
     return py3eval('NETRApi.RegisterHookerVimFn("'.a:hooker.'","'.a:fn.'")')
 endfunction
+
+function! netranger#api#registerBatchHookerVimFn(hooker, fn)
+    return py3eval('NETRApi.RegisterBatchHookerVimFn("'.a:hooker.'","'.a:fn.'")')
+endfunction
@@ -21,6 +21,11 @@ function! netranger#async#term_callback(job_id, data, event, cmd_win_id)
    exec g:_NETRPY.'netranger.Vim.VimAsyncCallBack("'.a:job_id.'","'.a:event.'","[]")'
 endfunction
 
+function! netranger#async#restart_timer(timer_id, delay, cmd)
+    call timer_stop(a:timer_id)
+    return timer_start(a:delay, {->execute(a:cmd)})
+endfunction
+
 function! netranger#async#search()
     set modifiable
     call setline(1, getcmdline())
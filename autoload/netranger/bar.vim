@@ -0,0 +1,22 @@
+" Show the header and the footer of netranger buffers in 'winbar' and
+" 'statusline' of the current window if g:NETRHeaderFooterBar is set, and
+" go back to the global values of these options if the window shows another
+" buffer. The contents are taken from b:_NETRHeader and b:_NETRFooter. Since
+" %{} results are not interpreted as statusline items, no escaping is needed.
+function! netranger#bar#check()
+    if &filetype ==# 'netranger' && get(g:, 'NETRHeaderFooterBar', 0)
+        if !exists('w:_NETRBar')
+            let w:_NETRBar = 1
+            if exists('+winbar')
+                setlocal winbar=%#NETRcwd#%{get(b:,'_NETRHeader','')}
+            endif
+            setlocal statusline=%#NETRfooter#%{get(b:,'_NETRFooter','')}
+        endif
+    elseif exists('w:_NETRBar')
+        unlet w:_NETRBar
+        if exists('+winbar')
+            setlocal winbar=
+        endif
+        setlocal statusline=
+    endif
+endfunction
@@ -0,0 +1,59 @@
+" Apply the highlights of the lines starting at the 0-based line {beg} of
+" buffer {bufnr}. {hls} holds a list of [begin byte, end byte, highlight group]
+" for each line (see pythonx/netranger/highlight.py). Previous highlights of
+" these lines are cleared.
+function! netranger#hl#apply(bufnr, beg, hls)
+    if empty(a:hls)
+        return
+    endif
+    if has('nvim')
+        let ns = nvim_create_namespace('netranger')
+        call nvim_buf_clear_namespace(a:bufnr, ns, a:beg, a:beg + len(a:hls))
+        let lnum = a:beg
+        for hl in a:hls
+            for [beg, end, group] in hl
+                call nvim_buf_add_highlight(a:bufnr, ns, group, lnum, beg, end)
+            endfor
+            let lnum += 1
+        endfor
+    else
+        call prop_clear(a:beg + 1, a:beg + len(a:hls), {'bufnr': a:bufnr})
+        let lnum = a:beg + 1
+        for hl in a:hls
+            for [beg, end, group] in hl
+                if empty(prop_type_get(group))
+                    call prop_type_add(group, {'highlight': group})
+                endif
+                call prop_add(lnum, beg + 1,
+                            \ {'end_col': end + 1, 'type': group, 'bufnr': a:bufnr})
+            endfor
+            let lnum += 1
+        endfor
+    endif
+endfunction
+
+" Highlight line {lnum} of the current window with {group} as the cursor line
+" of a netranger buffer, or remove the highlight if {group} is empty. The
+" highlight is a match of the window, so moving it does not modify the buffer.
+function! netranger#hl#cursor(lnum, group)
+    let cur = [bufnr('%'), a:lnum, a:group]
+    if get(w:, '_NETRCursorMatch', [0, 0, 0, ''])[1:] ==# cur
+        return
+    endif
+    if exists('w:_NETRCursorMatch')
+        silent! call matchdelete(w:_NETRCursorMatch[0])
+        unlet w:_NETRCursorMatch
+    endif
+    if a:group !=# ''
+        let w:_NETRCursorMatch = [matchaddpos(a:group, [a:lnum])] + cur
+    endif
+endfunction
+
+" Remove the cursor line highlight if the current window no longer shows the
+" buffer it was added for.
+function! netranger#hl#cursor_check()
+    if exists('w:_NETRCursorMatch') && w:_NETRCursorMatch[1] != bufnr('%')
+        silent! call matchdelete(w:_NETRCursorMatch[0])
+        unlet w:_NETRCursorMatch
+    endif
+endfunction
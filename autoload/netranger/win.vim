@@ -0,0 +1,65 @@
+" Return the text width of the current window, i.e. its width minus the
+" columns taken by the number, sign and fold columns. The result is cached in
+" w:_NETRTextWidth for the buffer, the window width and the number of digits
+" of the line count (which the number column grows with). Changes of the
+" other columns drop the cache via OptionSet (see plugin/netranger.vim).
+" With 'signcolumn' or (neovim) 'foldcolumn' set to auto, the columns come and
+" go with the signs and folds without any OptionSet, so the cache is not used.
+function! netranger#win#textwidth()
+    let key = [bufnr('%'), winwidth(0), len(line('$'))]
+    let cacheable = &signcolumn !~# '^auto' && &foldcolumn !~# '^auto'
+    if cacheable && exists('w:_NETRTextWidth') && w:_NETRTextWidth[0] ==# key
+        return w:_NETRTextWidth[1]
+    endif
+    let info = getwininfo(win_getid())[0]
+    if has_key(info, 'textoff')
+        let width = info.width - info.textoff
+    else
+        " getwininfo has no textoff in older vims. Measure the width by the
+        " virtual column of the last screen column instead.
+        let ve = &virtualedit
+        set virtualedit=all
+        noautocmd normal! g$
+        let width = virtcol('.')
+        noautocmd normal! g0
+        let &virtualedit = ve
+    endif
+    if cacheable
+        let w:_NETRTextWidth = [key, width]
+    else
+        unlet! w:_NETRTextWidth
+    endif
+    return width
+endfunction
+
+function! netranger#win#invalidate()
+    unlet! w:_NETRTextWidth
+endfunction
+
+" Return [winid, lnum, col] of the cursor of each existing window of
+" {winids}.
+function! netranger#win#cursors(winids)
+    return map(filter(copy(a:winids), '!empty(getwininfo(v:val))'),
+                \ {_, w -> [w] + getcurpos(w)[1:2]})
+endfunction
+
+" Restore the cursors returned by netranger#win#cursors. Lines are limited to
+" the line before the last one (the footer) of the buffer.
+function! netranger#win#restore_cursors(cursors)
+    for [winid, lnum, col] in a:cursors
+        call win_execute(winid,
+                    \ 'call cursor(min(['.lnum.', line("$") - 1]), '.col.')')
+    endfor
+endfunction
+
+" Go to the first window of {winids} in tab page and window order, skipping
+" the windows in tab page {skip_tabnr}. Return 1 on success, 0 otherwise.
+function! netranger#win#goto_first(winids, skip_tabnr)
+    let wins = map(copy(a:winids), {_, w -> win_id2tabwin(w) + [w]})
+    call filter(wins, {_, w -> w[0] > 0 && w[0] != a:skip_tabnr})
+    if empty(wins)
+        return 0
+    endif
+    call sort(wins, {a, b -> a[0] != b[0] ? a[0] - b[0] : a[1] - b[1]})
+    return win_gotoid(wins[0][2])
+endfunction
@@ -41,11 +41,25 @@ function NetrangerInit()
     augroup NETRANGER
         autocmd!
         autocmd BufEnter * exec g:_NETRPY.'ranger.on_bufenter('.expand("<abuf>").')'
+        autocmd BufWipeout * exec g:_NETRPY.'ranger.on_bufwipeout('.expand("<abuf>").')'
         autocmd Filetype netranger autocmd WinEnter <buffer> exec g:_NETRPY.'ranger.on_winenter('.expand("<abuf>").')'
         autocmd Filetype netranger autocmd CursorMoved <buffer> exec g:_NETRPY.'ranger.on_cursormoved('.expand("<abuf>").')'
+        if exists('##WinScrolled')
+            autocmd Filetype netranger autocmd WinScrolled <buffer> exec g:_NETRPY.'ranger.on_winscrolled('.winbufnr(str2nr(expand("<amatch>"))).','.expand("<amatch>").')'
+        endif
         autocmd Filetype netranger autocmd BufWriteCmd <buffer> exec g:_NETRPY.'ranger.NETRSave()'
         autocmd Filetype netranger setlocal foldtext=netranger#fold#foldtext()
         autocmd ColorScheme * call netranger#syntax#define()
+        autocmd BufWinEnter * call netranger#hl#cursor_check()
+        autocmd BufWinEnter * call netranger#bar#check()
+        autocmd WinNew * exec g:_NETRPY.'ranger.on_winbuf('.win_getid().','.bufnr('%').')'
+        autocmd BufWinEnter * exec g:_NETRPY.'ranger.on_winbuf('.win_getid().','.expand('<abuf>').')'
+        autocmd BufFilePost * exec g:_NETRPY.'ranger.on_buffile('.expand('<abuf>').')'
+        if exists('##WinClosed')
+            autocmd WinClosed * exec g:_NETRPY.'ranger.on_winclosed('.expand('<amatch>').')'
+        endif
+        autocmd OptionSet number,relativenumber,numberwidth,signcolumn,foldcolumn,statuscolumn call netranger#win#invalidate()
+        autocmd OptionSet ambiwidth exec g:_NETRPY.'netranger.strwidth.set_ambiwidth("'.&ambiwidth.'")'
     augroup END
     silent doautocmd USER NETRInit
 endfunction
@@ -38,18 +38,54 @@ else:
         return fn(obj, *args, **kwargs)
 
 
-if vim.eval('has("timers")') == "1" and not vim.vars.get("_NETRDebug", False):
+# Without timers (or in test), functions that should be called asynchronously
+# are called immediately.
+has_async_timer = vim.eval('has("timers")') == "1" and not vim.vars.get(
+    "_NETRDebug", False)
+
+if has_async_timer:
 
     def Timer(delay, pyfn, pyfn_str, *args):
         fn_args = ','.join([vim.eval(str(arg)) for arg in args])
         vim.command(
             f'call timer_start({delay}, {{->execute("python3 {pyfn_str}({fn_args})")}})'
         )
+
+    def TimerStart(delay, pyfn_str):
+        """ Call pyfn_str() every delay milliseconds. Return the timer id. """
+        return int(
+            vim.eval(f'timer_start({delay}, '
+                     f'{{->execute("python3 {pyfn_str}()")}}, '
+                     '{"repeat": -1})'))
+
+    def TimerStop(timer_id):
+        vim.command(f'call timer_stop({timer_id})')
+
+    def Debounce(timer_id, delay, pyfn, pyfn_str, *args):
+        """ Stop timer timer_id (if not None) and call pyfn_str(*args) after
+        delay milliseconds instead. Return the id of the new timer, which
+        should be passed to the next call. """
+        fn_args = ','.join([vim.eval(str(arg)) for arg in args])
+        return int(
+            vim.eval(f'netranger#async#restart_timer('
+                     f'{-1 if timer_id is None else timer_id}, {delay}, '
+                     f'"python3 {pyfn_str}({fn_args})")'))
 else:
 
     def Timer(delay, pyfn, pyfn_str, *args):
         pyfn(*args)
 
+    # Repeating timers can not be emulated synchronously.
+    def TimerStart(delay, pyfn_str):
+        return None
+
+    def TimerStop(timer_id):
+        pass
+
+    def Debounce(timer_id, delay, pyfn, pyfn_str, *args):
+        pyfn(*args)
+        return None
+
 
 if gui_compaitable:
 
@@ -219,14 +255,9 @@ def UserInput(hint, default=''):
 
 
 def CurWinWidth():
-    # This function takes gutter into consideration.
-    ve = vim.options['virtualedit']
-    vim.options['virtualedit'] = 'all'
-    vim.command('noautocmd norm! g$')
-    res = int(vim.eval('virtcol(".")'))
-    vim.command('noautocmd norm! g0')
-    vim.options['virtualedit'] = ve
-    return res
+    """ Return the text width of the current window, taking the gutter into
+    consideration. Cached per window, see netranger#win#textwidth. """
+    return int(vim.eval('netranger#win#textwidth()'))
 
 
 class pbar(object):
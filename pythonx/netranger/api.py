@@ -2,6 +2,54 @@ from netranger import Vim
 from netranger.fs import FSTarget
 
 
+class BatchHooker(object):
+    """ A node_highlight_content_l/_r hooker computing the segments of many
+    nodes in a single call (see NETRApi.RegisterBatchHooker).
+
+    Segments are cached by the full path of the nodes together with their
+    key. Called with a single node, it behaves like a plain hooker and
+    fetches the segment of the node on a cache miss.
+    """
+    def __init__(self, fn, key=None):
+        self.fn = fn
+        self.key = key
+        self._cache = {}
+
+    def __call__(self, node):
+        key = self.key(node) if self.key else None
+        entry = self._cache.get(node.fullpath)
+        if entry is None or entry[0] != key:
+            self.prefetch([node])
+            entry = self._cache[node.fullpath]
+        return entry[1]
+
+    def prefetch(self, nodes):
+        """ Fetch the segments of the nodes that are not cached or whose key
+        changed. """
+        cache = self._cache
+        key = self.key
+        stale = []
+        stale_keys = []
+        for node in nodes:
+            k = key(node) if key else None
+            entry = cache.get(node.fullpath)
+            if entry is None or entry[0] != k:
+                stale.append(node)
+                stale_keys.append(k)
+        if stale:
+            for node, k, segment in zip(stale, stale_keys, self.fn(stale)):
+                cache[node.fullpath] = (k, tuple(segment))
+
+    def clear(self):
+        self._cache = {}
+
+    def evict(self, paths):
+        """ Drop the cached segments of paths. """
+        cache = self._cache
+        for path in paths:
+            cache.pop(path, None)
+
+
 class NETRApi(object):
     Hookers = {
         'node_highlight_content_l': [],
@@ -10,7 +58,11 @@ class NETRApi(object):
         'render_end': [],
         'NETROpenCmd_end': [],
     }
+    BatchHookers = []
     ranger = None
+    # Part of the key of the rendered lines cached by EntryNode. Increased
+    # when the output of node_highlight_content hookers might change.
+    hooker_generation = 0
 
     @classmethod
     def init(self, ranger):
@@ -19,11 +71,68 @@ class NETRApi(object):
     @classmethod
     def RegisterHooker(self, hooker):
         self.Hookers[hooker.__name__].append(hooker)
+        self.hooker_generation += 1
 
     @classmethod
     def RegisterHookerVimFn(self, hooker, fn):
         self.Hookers[hooker].append(
             lambda api: Vim.eval(f'function("{fn}")()'))
+        self.hooker_generation += 1
+
+    @classmethod
+    def RegisterBatchHooker(self, hooker, key=None):
+        """ Register hooker, a node_highlight_content_l/_r hooker taking a
+        list of nodes and returning a (text, color) segment for each of them.
+        key(node) returns the invalidation key of a node's segment, e.g. its
+        mtime: segments are cached until the key changes. Without key,
+        segments are cached until render is called. """
+        batch_hooker = BatchHooker(hooker, key)
+        self.Hookers[hooker.__name__].append(batch_hooker)
+        self.BatchHookers.append(batch_hooker)
+        self.hooker_generation += 1
+
+    @classmethod
+    def RegisterBatchHookerVimFn(self, hooker, fn):
+        """ Register the vim function fn as a batch hooker (see
+        RegisterBatchHooker). fn takes a list of full paths and returns a list
+        of [text, color]. Segments are cached until the mtime of the node
+        changes. """
+        def batch_hooker(nodes):
+            Vim.vars['_NETRBatchPaths'] = [n.fullpath for n in nodes]
+            return [(text, int(color) if str(color).isdigit() else color)
+                    for text, color in Vim.eval(
+                        f'function("{fn}")(g:_NETRBatchPaths)')]
+
+        batch_hooker.__name__ = hooker
+        self.RegisterBatchHooker(batch_hooker, key=self.mtime_key)
+
+    @staticmethod
+    def mtime_key(node):
+        """ A batch hooker key: the mtime of node, or None if its stat
+        information is not available (e.g. broken links or lazy stat still
+        pending). """
+        return getattr(node, 'st_mtime_ns', None)
+
+    @classmethod
+    def prefetch_batch_hookers(self, nodes):
+        """ Fetch the segments of all batch hookers for nodes at once before
+        they are rendered one by one. """
+        for batch_hooker in self.BatchHookers:
+            batch_hooker.prefetch(nodes)
+
+    @classmethod
+    def evict_batch_hookers(self, nodes):
+        """ Drop the segments cached by all batch hookers for nodes, e.g.
+        when they are removed from a buffer. """
+        paths = [n.fullpath for n in nodes]
+        for batch_hooker in self.BatchHookers:
+            batch_hooker.evict(paths)
+
+    @classmethod
+    def batch_hooker_keys(self, node):
+        """ Return the keys of node for all keyed batch hookers. Part of the
+        key of the rendered line cached by EntryNode. """
+        return tuple(h.key(node) for h in self.BatchHookers if h.key)
 
     @classmethod
     def map(self, key, fn, check=False):
@@ -42,7 +151,10 @@ class NETRApi(object):
 
     @classmethod
     def node_index(self, node):
-        return self.ranger.cur_buf.nodes.index(node)
+        ind = self.ranger.cur_buf.node_table.index(node)
+        if ind < 0:
+            raise ValueError(f'{node.fullpath} is not in the buffer')
+        return ind
 
     @classmethod
     def next_lesseq_level_ind(self, begInd):
@@ -86,8 +198,14 @@ class NETRApi(object):
 
     @classmethod
     def render(self, bufNum=None):
+        """ Redraw all nodes of the buffer (the current one by default),
+        dropping the cached lines, e.g. when the output of hookers changes.
+        """
+        self.hooker_generation += 1
+        for batch_hooker in self.BatchHookers:
+            batch_hooker.clear()
         if bufNum:
-            buf = self.ranger.bufs[int(bufNum)]
+            buf = self.ranger._bufs[int(bufNum)]
         else:
             buf = self.ranger.cur_buf
-        buf.render()
+        buf.redraw_highlight()
@@ -0,0 +1,146 @@
+from __future__ import absolute_import
+
+
+class BufWriter(object):
+    """ Write lines to a vim buffer, sending only the lines that changed.
+
+    The lines last written are kept in a shadow list, against which new
+    content is diffed. Writes are done by slice assignments as with the vim
+    buffer itself, e.g.
+        writer[3] = line
+        writer[beg:end] = lines
+        writer[:] = lines
+
+    The shadow list must be dropped (see reset) when the buffer is modified by
+    other means, e.g. by the user in edit mode. Until the next full write, the
+    lines are then written as they are.
+
+    With a highlighter (see highlight.applier), a line is either a string or
+    a (text, highlights) pair as returned by highlight.render. The text is
+    written to the buffer and the highlights are applied to the written
+    lines. A line whose text is unchanged only gets its highlights applied.
+    """
+    # Changed lines of equal-sized content are written run by run. If there
+    # are more runs than this, the span from the first to the last run is
+    # written at once instead.
+    MAX_HUNKS = 32
+
+    def __init__(self, buf, highlighter=None):
+        self.buf = buf
+        self.highlighter = highlighter
+        self._lines = None
+
+    def reset(self):
+        self._lines = None
+
+    def __len__(self):
+        if self._lines is None:
+            return len(self.buf)
+        return len(self._lines)
+
+    def __setitem__(self, key, value):
+        lines = self._lines
+        if isinstance(key, slice):
+            if key.start is None and key.stop is None:
+                self._write_all(value)
+            elif lines is None:
+                beg, _, _ = key.indices(len(self.buf))
+                self._send(key, beg, list(value))
+            else:
+                beg, end, _ = key.indices(len(lines))
+                self._write(beg, max(beg, end), list(value))
+            return
+
+        if lines is None:
+            self._send_line(key % len(self.buf), value)
+            return
+        # Raise IndexError as the vim buffer does.
+        old = lines[key]
+        if old != value:
+            key %= len(lines)
+            if self.highlighter is not None and _text(old) == _text(value):
+                self.highlighter(key, [_highlights(value)])
+            else:
+                self._send_line(key, value)
+            lines[key] = value
+
+    def _write_all(self, lines):
+        lines = list(lines)
+        if self._lines is None or len(self._lines) != len(self.buf):
+            self._send(slice(None), 0, lines)
+            self._lines = lines
+        else:
+            self._write(0, len(self._lines), lines)
+
+    def _write(self, beg, end, lines):
+        """ Replace the shadow lines [beg, end) by lines and send the
+        difference to the vim buffer. """
+        old = self._lines[beg:end]
+        sz = min(len(old), len(lines))
+        prefix = 0
+        while prefix < sz and old[prefix] == lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < sz - prefix and old[-1 - suffix] == lines[-1 - suffix]:
+            suffix += 1
+        old_end = end - suffix
+        beg += prefix
+        lines = lines[prefix:len(lines) - suffix]
+        if beg == old_end and not lines:
+            return
+
+        if old_end - beg == len(lines):
+            self._write_runs(beg, lines)
+            self._lines[beg:old_end] = lines
+        else:
+            self._lines[beg:old_end] = lines
+            # Highlights of deleted lines might be moved to the line after
+            # the written ones, which is hence highlighted again.
+            after = self._lines[beg + len(lines):beg + len(lines) + 1]
+            self._send(slice(beg, old_end), beg, lines, after)
+
+    def _write_runs(self, beg, lines):
+        """ Write the runs of lines that differ from the shadow lines starting
+        at beg. """
+        old = self._lines
+        changed = [
+            i for i, line in enumerate(lines, beg) if old[i] != line
+        ]
+        runs = []
+        for i in changed:
+            if runs and runs[-1][1] == i:
+                runs[-1][1] = i + 1
+            else:
+                runs.append([i, i + 1])
+
+        if len(runs) > self.MAX_HUNKS:
+            runs = [[runs[0][0], runs[-1][1]]]
+        for run_beg, run_end in runs:
+            self._send(slice(run_beg, run_end), run_beg,
+                       lines[run_beg - beg:run_end - beg])
+
+    def _send(self, key, beg, lines, after=()):
+        """ Write lines to the buffer slice key starting at line beg. Apply
+        the highlights of lines and of the lines after them. """
+        if self.highlighter is None:
+            self.buf[key] = lines
+            return
+        self.buf[key] = [_text(line) for line in lines]
+        if lines or after:
+            self.highlighter(beg, [_highlights(line) for line in lines] +
+                             [_highlights(line) for line in after])
+
+    def _send_line(self, ind, line):
+        if self.highlighter is None:
+            self.buf[ind] = line
+            return
+        self.buf[ind] = _text(line)
+        self.highlighter(ind, [_highlights(line)])
+
+
+def _text(line):
+    return line[0] if isinstance(line, tuple) else line
+
+
+def _highlights(line):
+    return line[1] if isinstance(line, tuple) else ()
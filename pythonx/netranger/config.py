@@ -13,3 +13,12 @@ file_sz_display_wid = 6
 rclone_rcd_port = 13579
 rclone_rcd_test_port = 13578
 elipsis_note = '…'
+stat_pool_poll_interval = 50
+id_name_cache_size = 4096
+id_name_cache_ttl = 600
+child_count_cache_size = 65536
+dir_cache_dirname = 'dircache'
+stream_listing_chunk_size = 2000
+fs_watch_interval = 200
+virtual_render_margin = 100
+incremental_update_max_changes = 64
@@ -107,6 +107,15 @@ variables = {
     'NETRGuiColors': {},
     'NETRPreviewDelay': 200,
     'NETRLazyLoadStat': False,
+    'NETRStatWorkers': 8,
+    'NETRFooterStatTTL': 1000,
+    'NETRDirCache': False,
+    'NETRDirCacheSize': 1000,
+    'NETRStreamListing': False,
+    'NETRWatchFS': True,
+    'NETRVirtualRenderThreshold': 5000,
+    'NETRHighlightBackend': 'ansi',
+    'NETRHeaderFooterBar': False,
     'NETRPreviewDefaultOn': True,
     'NETRcloneRcdPort': 13579,
 }
@@ -0,0 +1,266 @@
+from __future__ import absolute_import
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+
+class CachedDirEntry(object):
+    """ A cached directory entry providing the os.DirEntry interface used by
+    NetRangerBuf.create_node and EntryNode.re_stat. """
+    __slots__ = ('name', 'path', 'linkto', 'record')
+
+    def __init__(self, dirname, record):
+        self.name = record[0]
+        self.path = os.path.join(dirname, self.name)
+        self.linkto = record[1]
+        self.record = record
+
+    def is_dir(self):
+        return bool(self.record[2] & DirCache.IS_DIR)
+
+    def is_symlink(self):
+        return bool(self.record[2] & DirCache.IS_LINK)
+
+    def stat(self):
+        if not self.record[2] & DirCache.HAS_STAT:
+            raise FileNotFoundError(self.path)
+        return DirCache.record_stat(self.record)
+
+
+class DirCache(object):
+    """ An on-disk cache of directory listings and the stat information of
+    their entries, so that a directory can be displayed without listing it
+    again across vim sessions.
+
+    Each directory is stored in a file named by the hash of its path. The file
+    is keyed by the inode and mtime of the directory: a cached listing is only
+    used if both are unchanged. As the mtime of a directory does not change
+    when its entries are modified, the stat information must be revalidated
+    (see refresh). At most max_files directories are cached: the files used
+    least recently (by mtime, which load bumps) are removed beyond that.
+
+    File layout (little endian):
+        header: magic, version, dir inode, dir mtime_ns, path length, number
+                of entries
+        path: utf-8 (surrogateescape) encoded
+        records: one fixed size record per entry
+        strings: the name and link target of each entry in record order
+    """
+    MAGIC = b'NRDC'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHQqII')
+    # flags, st_mode, st_uid, st_gid, st_size, st_atime, st_ctime,
+    # st_mtime_ns, name length, link target length
+    RECORD = struct.Struct('<IIIIqddqHH')
+    IS_DIR = 1
+    IS_LINK = 2
+    HAS_STAT = 4
+    HAS_LINKTO = 8
+    TMP_PREFIX = 'tmp'
+
+    def __init__(self, cache_dir, max_files=1000):
+        self.cache_dir = cache_dir
+        self.max_files = max_files
+
+    def cache_path(self, dirname):
+        return os.path.join(
+            self.cache_dir,
+            hashlib.sha1(os.fsencode(dirname)).hexdigest())
+
+    def load(self, dirname):
+        """ Return the cached entries (CachedDirEntry) of dirname, or None if
+        the cache is missing or outdated. """
+        try:
+            dir_stat = os.stat(dirname)
+        except OSError:
+            return None
+        records = self._load_records(dirname, dir_stat)
+        if records is None:
+            return None
+        try:
+            # Mark the file as recently used (see _evict).
+            os.utime(self.cache_path(dirname))
+        except OSError:
+            pass
+        return [CachedDirEntry(dirname, r) for r in records]
+
+    def _load_records(self, dirname, dir_stat):
+        try:
+            with open(self.cache_path(dirname), 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return self._parse(mm, dirname, dir_stat)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def _parse(self, buf, dirname, dir_stat):
+        magic, version, ino, mtime_ns, path_len, count =\
+            self.HEADER.unpack_from(buf, 0)
+        if magic != self.MAGIC or version != self.VERSION\
+                or ino != dir_stat.st_ino or mtime_ns != dir_stat.st_mtime_ns:
+            return None
+        offset = self.HEADER.size
+        if buf[offset:offset + path_len] != os.fsencode(dirname):
+            return None
+        offset += path_len
+
+        str_offset = offset + count * self.RECORD.size
+        view = memoryview(buf)
+        records = []
+        try:
+            for (flags, mode, uid, gid, size, atime, ctime, mtime_ns,
+                 name_len, link_len) in self.RECORD.iter_unpack(
+                     view[offset:str_offset]):
+                name = os.fsdecode(bytes(view[str_offset:str_offset +
+                                              name_len]))
+                str_offset += name_len
+                linkto = None
+                if flags & self.HAS_LINKTO:
+                    linkto = os.fsdecode(
+                        bytes(view[str_offset:str_offset + link_len]))
+                str_offset += link_len
+                records.append((name, linkto, flags, mode, uid, gid, size,
+                                atime, ctime, mtime_ns))
+        finally:
+            view.release()
+        return records
+
+    @staticmethod
+    def same_record(a, b):
+        """ Return True if two records only differ in st_atime, which
+        changes whenever a file is read. """
+        return a[:7] == b[:7] and a[8:] == b[8:]
+
+    @classmethod
+    def same_records(self, a, b):
+        return len(a) == len(b) and all(
+            self.same_record(r1, r2) for r1, r2 in zip(a, b))
+
+    @classmethod
+    def record_stat(self, record):
+        """ Return the os.stat_result of a record. Fields not stored in the
+        cache are zero. """
+        _, _, _, mode, uid, gid, size, atime, ctime, mtime_ns = record
+        mtime = mtime_ns / 1e9
+        return os.stat_result(
+            (mode, 0, 0, 0, uid, gid, size, int(atime), int(mtime),
+             int(ctime)), {
+                 'st_atime': atime,
+                 'st_mtime': mtime,
+                 'st_ctime': ctime,
+                 'st_mtime_ns': mtime_ns
+             })
+
+    @classmethod
+    def record_stat_info(self, record):
+        """ Return (linkto, stat) of a record as LocalFS.stat_info. """
+        if not record[2] & self.HAS_STAT:
+            return record[1], None
+        return record[1], self.record_stat(record)
+
+    @classmethod
+    def scan(self, dirname):
+        """ Return (dir stat, records) of the entries of dirname. Safe to be
+        called in worker threads. """
+        dir_stat = os.stat(dirname)
+        records = []
+        with os.scandir(dirname) as it:
+            for e in it:
+                flags = 0
+                linkto = None
+                try:
+                    if e.is_symlink():
+                        flags |= self.IS_LINK
+                        linkto = os.readlink(e.path)
+                        flags |= self.HAS_LINKTO
+                except OSError:
+                    pass
+                try:
+                    if e.is_dir():
+                        flags |= self.IS_DIR
+                    st = e.stat()
+                    flags |= self.HAS_STAT
+                    records.append(
+                        (e.name, linkto, flags, st.st_mode, st.st_uid,
+                         st.st_gid, st.st_size, st.st_atime, st.st_ctime,
+                         st.st_mtime_ns))
+                except OSError:
+                    records.append(
+                        (e.name, linkto, flags, 0, 0, 0, 0, 0., 0., 0))
+        return dir_stat, records
+
+    def save(self, dirname, dir_stat, records):
+        """ Write the records of dirname to the cache atomically. Safe to be
+        called in worker threads. """
+        path = os.fsencode(dirname)
+        chunks = [
+            self.HEADER.pack(self.MAGIC, self.VERSION, dir_stat.st_ino,
+                             dir_stat.st_mtime_ns, len(path), len(records)),
+            path
+        ]
+        strings = []
+        for (name, linkto, flags, mode, uid, gid, size, atime, ctime,
+             mtime_ns) in records:
+            name = os.fsencode(name)
+            linkto = b'' if linkto is None else os.fsencode(linkto)
+            chunks.append(
+                self.RECORD.pack(flags, mode, uid, gid, size, atime, ctime,
+                                 mtime_ns, len(name), len(linkto)))
+            strings.append(name)
+            strings.append(linkto)
+        chunks.extend(strings)
+
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = self.cache_path(dirname)
+        is_new = not os.path.exists(cache_path)
+        fd, tmp = tempfile.mkstemp(prefix=self.TMP_PREFIX, dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(b''.join(chunks))
+            os.replace(tmp, cache_path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if is_new:
+            self._evict()
+
+    def _evict(self):
+        """ Remove the least recently used files if there are more than
+        max_files. Files removed concurrently by other threads or vim
+        instances are ignored. """
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        if len(names) <= self.max_files:
+            return
+        mtimes = []
+        for name in names:
+            # Skip the files being written by save.
+            if name.startswith(self.TMP_PREFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtimes.append((os.stat(path).st_mtime_ns, path))
+            except OSError:
+                pass
+        mtimes.sort()
+        for _, path in mtimes[:len(mtimes) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def refresh(self, dirname):
+        """ Scan dirname, update its cache and return the records (see
+        scan). The cache file is only rewritten if the records changed (see
+        same_record). Safe to be called in worker threads. """
+        dir_stat, records = self.scan(dirname)
+        cached = self._load_records(dirname, dir_stat)
+        if cached is None or not self.same_records(cached, records):
+            self.save(dirname, dir_stat, records)
+        return records
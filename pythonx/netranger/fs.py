@@ -5,14 +5,26 @@ import os
 import pickle
 import re
 import shutil
+import stat
 import tempfile
 import time
+from collections import OrderedDict
+from itertools import islice
+from sys import platform
 
 from netranger import Vim, util
-from netranger.config import file_sz_display_wid
+from netranger.config import (child_count_cache_size, elipsis_note,
+                              file_sz_display_wid, id_name_cache_size,
+                              id_name_cache_ttl)
 from netranger.enum import Enum
 from netranger.shell import Shell
 
+if platform == "win32":
+    from os import getenv
+else:
+    import pwd
+    import grp
+
 FType = Enum('FileType', 'SOCK, LNK, REG, BLK, DIR, CHR, FIFO')
 
 
@@ -20,6 +32,68 @@ def do_nothing():
     pass
 
 
+class IdNameCache(object):
+    def __init__(self, lookup, maxsize=id_name_cache_size,
+                 ttl=id_name_cache_ttl):
+        """ A bounded cache with time-to-live (in seconds) mapping uid/gid
+        to user/group names, shared by all buffers. Each lookup might be an
+        NSS (e.g. LDAP) request, so we look up each id only once in a while.
+        If lookup raises KeyError (unknown id), the id itself is cached.
+        hits/misses count the cache hits/misses for inspection.
+        """
+        self._lookup = lookup
+        self._cache = OrderedDict()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def __getitem__(self, id):
+        now = time.monotonic()
+        entry = self._cache.get(id)
+        if entry is not None and now - entry[1] < self.ttl:
+            self.hits += 1
+            self._cache.move_to_end(id)
+            return entry[0]
+
+        self.misses += 1
+        try:
+            name = self._lookup(id)
+        except KeyError:
+            name = id
+        self._cache[id] = (name, now)
+        self._cache.move_to_end(id)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return name
+
+    def clear(self):
+        self._cache.clear()
+
+
+class ChildCountCache(object):
+    def __init__(self, maxsize=child_count_cache_size):
+        """ A bounded cache of the number of entries of directories keyed by
+        (path, st_mtime_ns). Adding or removing an entry changes the mtime of
+        a directory, so a count is valid as long as the mtime stays the same.
+        """
+        self._cache = OrderedDict()
+        self.maxsize = maxsize
+
+    def get(self, path, mtime_ns):
+        entry = self._cache.get(path)
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        self._cache.move_to_end(path)
+        return entry[1]
+
+    def set(self, path, mtime_ns, count):
+        self._cache[path] = (mtime_ns, count)
+        self._cache.move_to_end(path)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+
 class FSTarget(object):
     def __init__(self, target_path=''):
         """ This is a help class for separating local files and remote files
@@ -141,9 +215,36 @@ class LocalFS(object):
     def ensure_remote_downloaded(cls, _):
         pass
 
+    if hasattr(os, 'geteuid'):
+        euid = os.geteuid()
+        egids = set(os.getgroups()) | {os.getegid()}
+    else:
+        euid = None
+        egids = set()
+
     @classmethod
     def ls(self, dirname, cheap_remote_ls=False):
-        return sorted(os.listdir(dirname), key=lambda x: os.path.isdir(x))
+        return os.listdir(dirname)
+
+    @classmethod
+    def scandir(self, dirname, cheap_remote_ls=False):
+        """ Return the os.DirEntry of each file in dirname. DirEntry caches
+        the file type from the directory listing and the stat result after
+        the first call, so nodes can be built with a single pass.
+        """
+        with os.scandir(dirname) as it:
+            return list(it)
+
+    @classmethod
+    def scandir_chunks(self, dirname, first_size, chunk_size):
+        """ Generate the os.DirEntry of each file in dirname in lists of
+        first_size and then chunk_size entries, as they are read from the
+        directory. """
+        with os.scandir(dirname) as it:
+            chunk = list(islice(it, first_size))
+            while chunk:
+                yield chunk
+                chunk = list(islice(it, chunk_size))
 
     @classmethod
     def parent_dir(self, cwd):
@@ -217,14 +318,78 @@ class LocalFS(object):
     def mkdir(self, name):
         Shell.mkdir(name)
 
+    if platform == "win32":
+        user_names = IdNameCache(lambda uid: getenv("USERNAME"))
+        group_names = IdNameCache(lambda gid: getenv("USERDOMAIN"))
+    else:
+        user_names = IdNameCache(lambda uid: pwd.getpwuid(uid)[0])
+        group_names = IdNameCache(lambda gid: grp.getgrgid(gid)[0])
+
+    child_counts = ChildCountCache()
+    child_count_placeholder = elipsis_note
+
+    @classmethod
+    def user_name(self, uid):
+        return self.user_names[uid]
+
+    @classmethod
+    def group_name(self, gid):
+        return self.group_names[gid]
+
+    @classmethod
+    def stat_info(self, path):
+        """ Return (linkto, stat) of path, where linkto is None if path is not
+        a symbolic link and stat is None if path can not be stat (e.g. broken
+        link). This function does not touch vim and hence is safe to be called
+        in worker threads.
+        """
+        linkto = None
+        if os.path.islink(path):
+            try:
+                linkto = os.readlink(path)
+            except (OSError, FileNotFoundError, PermissionError):
+                pass
+        try:
+            return linkto, os.stat(path)
+        except (OSError, FileNotFoundError, PermissionError):
+            return linkto, None
+
+    @classmethod
+    def count_children(self, path):
+        """ Return the number of entries in directory path. Safe to be called
+        in worker threads. """
+        return len(os.listdir(path))
+
+    @classmethod
+    def is_executable(self, statinfo):
+        """ Decide os.access(path, os.X_OK) from the mode bits of a stat
+        result (of a non-directory) without another syscall.
+        """
+        mode = statinfo.st_mode
+        if self.euid is None or self.euid == 0:
+            return bool(mode & 0o111)
+        if statinfo.st_uid == self.euid:
+            return bool(mode & stat.S_IXUSR)
+        if statinfo.st_gid in self.egids:
+            return bool(mode & stat.S_IXGRP)
+        return bool(mode & stat.S_IXOTH)
+
     @classmethod
     def mtime(self, fname):
         return os.stat(fname).st_mtime
 
     @classmethod
     def size_str(self, path, statinfo):
-        if os.path.isdir(path):
-            return str(len(os.listdir(path)))
+        """ Return the size column of a node. For a directory, the size is
+        the number of its entries, which is looked up in child_counts. If not
+        cached, child_count_placeholder is returned and the caller should
+        count the entries by count_children (in the background).
+        """
+        if stat.S_ISDIR(statinfo.st_mode):
+            count = self.child_counts.get(path, statinfo.st_mtime_ns)
+            if count is None:
+                return self.child_count_placeholder
+            return str(count)
 
         res = float(statinfo.st_size)
         for u in ['B', 'K', 'M', 'G', 'T', 'P']:
@@ -301,8 +466,10 @@ class Rclone(LocalFS):
         return rpath
 
     @classmethod
-    def ls(self, dirname, cheap_remote_ls=False):
-        if not cheap_remote_ls and len(dirname) > len(self.root_dir):
+    def sync_ls(self, dirname):
+        """ Make the local cache of dirname contain the same file names as
+        the remote directory. """
+        if len(dirname) > len(self.root_dir):
             local_files = set([
                 name for name in Shell.run(f'ls -p "{dirname}"').split('\n')
                 if len(name) > 0
@@ -324,8 +491,19 @@ class Rclone(LocalFS):
                 Shell.run_async(f'rclone {self._flags} copyto --tpslimit=10 \
                                 "{os.path.join(dirname, name)}" \
                                 "{os.path.join(self.rpath(dirname), name)}"')
+
+    @classmethod
+    def ls(self, dirname, cheap_remote_ls=False):
+        if not cheap_remote_ls:
+            self.sync_ls(dirname)
         return super(Rclone, self).ls(dirname)
 
+    @classmethod
+    def scandir(self, dirname, cheap_remote_ls=False):
+        if not cheap_remote_ls:
+            self.sync_ls(dirname)
+        return super(Rclone, self).scandir(dirname)
+
     @classmethod
     def ensure_remote_downloaded(self, lpath):
         if os.stat(lpath).st_size == 0:
@@ -0,0 +1,88 @@
+from __future__ import absolute_import
+
+import json
+import re
+
+from netranger import Vim, default
+from netranger.colortbl import colorind2hexstr
+from netranger.util import is_ascii
+
+# The highlight backend in use (see init):
+#     ansi: lines carry ANSI escapes matched by syntax/netranger.vim.
+#     extmark: lines are plain text. Highlights are applied by
+#              netranger#hl#apply with nvim extmarks or vim text properties.
+backend = 'ansi'
+_color_groups = {}
+
+
+def init(backend_name):
+    """ Set the backend by the NETRHighlightBackend option. extmark falls back
+    to ansi if neither nvim extmarks nor vim text properties are available.
+    Must be called after the colors in default.color are resolved. """
+    global backend
+    backend = 'ansi'
+    if backend_name == 'extmark' and (Vim.eval('has("nvim")') == '1'
+                                      or Vim.eval('has("textprop")') == '1'):
+        backend = 'extmark'
+    Vim.SetVar('_NETRHighlightBackend', backend)
+
+    _color_groups.clear()
+    for name, color in default.color.items():
+        _color_groups.setdefault(color, 'NETR' + name)
+    return backend
+
+
+def render(segments):
+    """ Return the line of segments, a list of (text, color) where color is a
+    value of default.color.
+
+    The ansi backend returns the text with escapes (see Vim.ColorMsg). The
+    extmark backend returns (text, highlights), where highlights are
+    (begin byte, end byte, highlight group) of the nonempty segments.
+    """
+    if backend == 'ansi':
+        return ''.join(Vim.ColorMsg(t, c, False) for t, c in segments)
+
+    texts = []
+    hls = []
+    col = 0
+    for text, color in segments:
+        sz = _byte_len(text)
+        if sz:
+            hls.append((col, col + sz, _color_group(color)))
+            col += sz
+        texts.append(text)
+    return ''.join(texts), tuple(hls)
+
+
+def applier(bufnr):
+    """ Return a function applying highlights to the lines of buffer bufnr.
+    The function takes the 0-based line number of the first line and the
+    highlights (see render) of each line. """
+    def apply(beg, hls):
+        Vim.command(
+            f'call netranger#hl#apply({bufnr}, {beg}, {json.dumps(hls)})')
+
+    return apply
+
+
+def _byte_len(text):
+    if is_ascii(text):
+        return len(text)
+    return len(text.encode('utf-8', 'surrogateescape'))
+
+
+def _color_group(color):
+    """ Return the highlight group of color. Colors not in default.color
+    (e.g. from hookers) get a group defined on first use. """
+    group = _color_groups.get(color)
+    if group is None:
+        group = 'NETRColor' + re.sub('[^0-9A-Za-z]', '_', str(color))
+        if Vim.gui_compaitable:
+            hexstr = '#' + ''.join(f'{int(c):02x}' for c in color.split(';'))
+            Vim.command(f'hi {group} guifg={hexstr}')
+        else:
+            hexstr = colorind2hexstr[color]
+            Vim.command(f'hi {group} ctermfg={color} guifg={hexstr}')
+        _color_groups[color] = group
+    return group
@@ -4,31 +4,38 @@ import datetime
 import fnmatch
 import os
 import re
+import time
 from collections import defaultdict
-from sys import platform
 
-from netranger import Vim, default, preview
+from netranger import Vim, default, highlight, preview, strwidth
 from netranger.api import NETRApi
+from netranger.bufwriter import BufWriter
 from netranger.colortbl import colorhexstr2ind, colorind2hexstr, colorname2ind
-from netranger.config import elipsis_note, file_sz_display_wid
+from netranger.config import (dir_cache_dirname, elipsis_note,
+                               file_sz_display_wid, fs_watch_interval,
+                               incremental_update_max_changes,
+                               stat_pool_poll_interval,
+                               stream_listing_chunk_size,
+                               virtual_render_margin)
+from netranger.dircache import DirCache
 from netranger.enum import Enum
 from netranger.fs import FSTarget, LocalFS, Rclone
+from netranger.nodetable import NodeTable
 from netranger.rifle import Rifle
 from netranger.shell import Shell
+from netranger.statpool import StatPool
 from netranger.ui import AskUI, HelpUI, NewUI, SortUI
-
-if platform == "win32":
-    from os import getenv
-else:
-    import pwd
-    import grp
+from netranger.watcher import InotifyWatcher
+from netranger.winindex import WinIndex
 
 
 class Node(object):
     """General node.
 
-    Inherited by header nodes or entry nodes.
+    Inherited by header nodes or entry nodes. Nodes use __slots__ to stay
+    small as a buffer might hold millions of them after recursive expansion.
     """
+    __slots__ = ('fullpath', 'name', 'hi_key', 'level', 'state')
     State = Enum('NodeState', 'NORMAL, PICKED, UNDEROP')
     ToggleOpRes = Enum('NodeToggleOpRes', 'INVALID, ON, OFF')
 
@@ -38,15 +45,21 @@ class Node(object):
         self.set_highlight(highlight)
         self.level = level
         self.state = Node.State.NORMAL
-        self.is_cursor_on = False
 
     def set_highlight(self, highlight):
-        self.vim_hi_group = 'NETR' + highlight
-        self.highlight = default.color[highlight]
+        self.hi_key = highlight
+
+    @property
+    def highlight(self):
+        return default.color[self.hi_key]
+
+    @property
+    def vim_hi_group(self):
+        return 'NETR' + self.hi_key
 
     @property
     def highlight_content(self):
-        return Vim.ColorMsg(self.name, self.highlight, self.is_cursor_on)
+        return highlight.render([(self.name, self.highlight)])
 
     @property
     def is_DIR(self):
@@ -56,12 +69,6 @@ class Node(object):
     def is_INFO(self):
         return False
 
-    def cursor_on(self):
-        self.is_cursor_on = True
-
-    def cursor_off(self):
-        self.is_cursor_on = False
-
     def toggle_pick(self):
         return Node.ToggleOpRes.INVALID
 
@@ -70,6 +77,8 @@ class Node(object):
 
 
 class FooterNode(Node):
+    __slots__ = ()
+
     def __init__(self):
         super(FooterNode, self).__init__("", "", 'footer')
 
@@ -79,6 +88,8 @@ class FooterNode(Node):
 
 
 class HeaderNode(Node):
+    __slots__ = ('stat', )
+
     def __init__(self, fullpath):
         super(HeaderNode, self).__init__(fullpath,
                                          Shell.abbrevuser(fullpath),
@@ -89,17 +100,25 @@ class HeaderNode(Node):
     def re_stat(self):
         self.stat = os.stat(self.fullpath)
 
-    @property
-    def highlight_content(self):
-        return Vim.ColorMsg(self.name, self.highlight, False)
-
     @property
     def is_INFO(self):
         return True
 
 
 class EntryNode(Node):
-    """Content node."""
+    """Content node.
+
+    Instead of keeping an os.stat_result, only the needed stat fields are
+    stored and the node itself serves as the stat result (see stat). The
+    size/acl/user/group columns are formatted on demand.
+
+    The rendered line is cached (see highlight_content) until the node is
+    mutated, e.g. by re_stat, rename or a highlight change.
+    """
+    __slots__ = ('buf', 'linkto', 'ori_highlight', 'stat_pending', 'st_mode',
+                 'st_size', 'st_uid', 'st_gid', 'st_atime', 'st_ctime',
+                 'st_mtime_ns', 'stat_time', '_sort_key', '_render_cache')
+
     def abbrev_name(self, width):
         """ Return abbreviation of self.name such that it fits into `width`
         (terminal) columns.
@@ -109,7 +128,7 @@ class EntryNode(Node):
         else:
             name = self.name
 
-        sz = Vim.strwidth(name)
+        sz = strwidth.strwidth(name)
 
         if width >= sz:
             # Conceptually, we should add (width - sz) spaces to meet the
@@ -120,7 +139,7 @@ class EntryNode(Node):
             ext_beg = name.rfind('.')
             if ext_beg > 0:
                 name, ext = name[:ext_beg], elipsis_note + name[ext_beg:]
-                sz = Vim.strwidth(name)
+                sz = strwidth.strwidth(name)
             else:
                 ext = elipsis_note
 
@@ -137,7 +156,7 @@ class EntryNode(Node):
         equal to w.
         """
         from itertools import accumulate
-        length = list(accumulate([Vim.strwidth(c) for c in s]))
+        length = list(accumulate(strwidth.char_widths(s)))
         if w < length[0]:
             return elipsis_note * w
 
@@ -158,42 +177,83 @@ class EntryNode(Node):
 
     @property
     def highlight_content(self):
-        width = self.buf.winwidth
+        """ The line of the node. The line is cached for the key of everything
+        it depends on but the size column, which is invalidated explicitly
+        (see invalidate_render_cache). """
+        key = (self.name, self.linkto, self.level, self.hi_key,
+               self.buf.winwidth, NETRApi.hooker_generation,
+               strwidth.ambiwidth, NETRApi.batch_hooker_keys(self)
+               if NETRApi.BatchHookers else None)
+        cache = self._render_cache
+        if cache is None or cache[0] != key:
+            cache = self._render_cache = (key,
+                                          self._render(self.buf.winwidth))
+        return cache[1]
+
+    def invalidate_render_cache(self):
+        self._render_cache = None
+
+    def _render(self, width):
         level_pad = '  ' * self.level
         size_info = self.size.rjust(file_sz_display_wid + 1)
 
         left = level_pad
         right = size_info
 
-        def c(msg):
-            return Vim.ColorMsg(msg, self.highlight, self.is_cursor_on)
+        hi = self.highlight
 
         if NETRApi.HasHooker('node_highlight_content_l',
                              'node_highlight_content_r'):
-            left_extra = ''
+            left_extra = []
             left_extra_len = 0
             for hooker in NETRApi.Hookers['node_highlight_content_l']:
                 l_s, l_h = hooker(self)
-                left_extra_len += Vim.strwidth(l_s)
-                left_extra += Vim.ColorMsg(l_s, l_h, False)
+                left_extra_len += strwidth.strwidth(l_s)
+                left_extra.append((l_s, l_h))
 
-            right_extra = ''
+            right_extra = []
             right_extra_len = 0
             for hooker in NETRApi.Hookers['node_highlight_content_r']:
                 r_s, r_h = hooker(self)
-                right_extra_len += Vim.strwidth(r_s)
-                right_extra += Vim.ColorMsg(r_s, r_h, False)
+                right_extra_len += strwidth.strwidth(r_s)
+                right_extra.append((r_s, r_h))
 
-            # Calling c and concatenation multiple times is rather expensive.
-            # Hence we avoid it if possible.
+            # Rendering multiple segments is rather expensive. Hence we avoid
+            # it if possible.
             if left_extra_len or right_extra_len:
-                return c(left) + left_extra + c(
-                    self.abbrev_name(width - len(left) - len(right) -
-                                     left_extra_len -
-                                     right_extra_len)) + c(right) + right_extra
+                name = self.abbrev_name(width - len(left) - len(right) -
+                                        left_extra_len - right_extra_len)
+                return highlight.render([(left, hi)] + left_extra +
+                                        [(name, hi), (right, hi)] +
+                                        right_extra)
+
+        return highlight.render([
+            (f'{left}{self.abbrev_name(width - len(left) - len(right))}{right}',
+             hi)
+        ])
 
-        return c(
-            f'{left}{self.abbrev_name(width - len(left) - len(right))}{right}')
+    @property
+    def stat(self):
+        """ Return the node itself if its stat information is loaded, None
+        otherwise. The node provides the st_* fields used by LocalFS and
+        SortUI. Other os.stat_result fields are read by __getattr__. """
+        if self.st_mode is None:
+            return None
+        return self
+
+    def __getattr__(self, name):
+        """ Return the os.stat_result fields not kept by the node (e.g.
+        st_ino, st_nlink, st_dev) from a fresh os.stat of the node, so that
+        stat can be used in place of an os.stat_result by plugins. Only called
+        for attributes not found otherwise, including unset slots. """
+        if not name.startswith('st_') or name in EntryNode.__slots__\
+                or self.st_mode is None:
+            raise AttributeError(name)
+        return getattr(os.stat(self.fullpath), name)
+
+    @property
+    def st_mtime(self):
+        return self.st_mtime_ns / 1e9
 
     @property
     def mtime(self):
@@ -203,76 +263,176 @@ class EntryNode(Node):
         else:
             return ''
 
-    def __init__(self, fullpath, name, level=0, buf=None):
+    @property
+    def size(self):
+        if self.st_mode is None:
+            return ''
+        # The entries of a directory are counted when the node is rendered
+        # (see NetRangerBuf.render_nodes). The placeholder is shown until then.
+        try:
+            return LocalFS.size_str(self.fullpath, self)
+        except (OSError, FileNotFoundError, PermissionError):
+            return '?'
+
+    @property
+    def acl(self):
+        if self.st_mode is None:
+            return ''
+        return LocalFS.acl_str(self)
+
+    @property
+    def user(self):
+        if self.st_mode is None:
+            return ''
+        return LocalFS.user_name(self.st_uid)
+
+    @property
+    def group(self):
+        if self.st_mode is None:
+            return ''
+        return LocalFS.group_name(self.st_gid)
+
+    def __init__(self,
+                 fullpath,
+                 name,
+                 level=0,
+                 buf=None,
+                 dir_entry=None,
+                 lazy=False):
         self.fullpath = fullpath
         self.buf = buf
-        self.re_stat(lazy=Vim.Var('NETRLazyLoadStat'))
-        highlight = self.decide_hi()
+        self.stat_pending = False
+        self._render_cache = None
+        self.re_stat(lazy=lazy, dir_entry=dir_entry)
+        highlight = self.decide_hi(guess=lazy)
         super(EntryNode, self).__init__(fullpath, name, highlight, level=level)
         self.ori_highlight = highlight
 
-    def re_stat(self, lazy=False):
-        self.linkto = None
-        if os.path.islink(self.fullpath):
-            try:
-                self.linkto = os.readlink(self.fullpath)
-            except (OSError, FileNotFoundError, PermissionError):
-                pass
-
-        if not lazy:
-            try:
-                self.stat = os.stat(self.fullpath)
-            except (OSError, FileNotFoundError, PermissionError):
-                self.stat = None
+    def re_stat(self, lazy=False, dir_entry=None):
+        """ Update the stat information of the node. If dir_entry (the
+        os.DirEntry from listing the parent directory) is given, its cached
+        file type and stat result are used to save syscalls. If lazy is True,
+        the stat information is left empty (see NetRangerBuf._request_stat).
+        """
+        linkto = None
+        if dir_entry is None:
+            is_link = os.path.islink(self.fullpath)
         else:
-            self.stat = None
-
-        if self.stat:
-            try:
-                self.size = LocalFS.size_str(self.fullpath, self.stat)
-            except (OSError, FileNotFoundError, PermissionError):
-                self.size = '?'
+            is_link = dir_entry.is_symlink()
+        if is_link:
+            # Entries loaded from DirCache carry their link target.
+            linkto = getattr(dir_entry, 'linkto', None)
+            if linkto is None:
+                try:
+                    linkto = os.readlink(self.fullpath)
+                except (OSError, FileNotFoundError, PermissionError):
+                    pass
 
-            self.acl = LocalFS.acl_str(self.stat)
+        stat = None
+        if not lazy:
             try:
-                if platform == "win32":
-                    self.user = getenv("USERNAME")
-                    self.group = getenv("USERDOMAIN")
+                if dir_entry is None:
+                    stat = os.stat(self.fullpath)
                 else:
-                    self.user = pwd.getpwuid(self.stat.st_uid)[0]
-                    self.group = grp.getgrgid(self.stat.st_gid)[0]
-            except KeyError:
-                self.user = self.stat.st_uid
-                self.group = self.stat.st_gid
-        else:
-            self.size = ''
-            self.acl = ''
-            self.user = ''
-            self.group = ''
-
-    def decide_hi(self):
+                    stat = dir_entry.stat()
+            except (OSError, FileNotFoundError, PermissionError):
+                pass
+        self.set_stat(linkto, stat)
+
+    def set_stat(self, linkto, stat):
+        """ Set the link target and the stat fields from an os.stat_result
+        (see LocalFS.stat_info). """
+        self.linkto = linkto
+        self.stat_time = time.monotonic()
+        self._sort_key = None
+        self._render_cache = None
+        if stat is None:
+            self.st_mode = None
+            self.st_size = None
+            self.st_uid = None
+            self.st_gid = None
+            self.st_atime = None
+            self.st_ctime = None
+            self.st_mtime_ns = None
+            return
+        self.st_mode = stat.st_mode
+        self.st_size = stat.st_size
+        self.st_uid = stat.st_uid
+        self.st_gid = stat.st_gid
+        self.st_atime = stat.st_atime
+        self.st_ctime = stat.st_ctime
+        self.st_mtime_ns = stat.st_mtime_ns
+
+    def same_stat(self, linkto, stat):
+        """ Return True if linkto and stat (see set_stat) carry the same
+        information as the node. """
+        if linkto != self.linkto:
+            return False
+        if stat is None or self.st_mode is None:
+            return stat is None and self.st_mode is None
+        return (self.st_mode, self.st_size, self.st_uid, self.st_gid,
+                self.st_ctime, self.st_mtime_ns) == (
+                    stat.st_mode, stat.st_size, stat.st_uid, stat.st_gid,
+                    stat.st_ctime, stat.st_mtime_ns)
+
+    def decide_hi(self, guess=False):
+        """ Return the highlight key according to the file type. If guess is
+        True and the stat information is not loaded, decide without syscalls.
+        """
+        # The stat result follows symlinks. Hence a successful stat implies
+        # that a link is not broken and its mode bits tell the executability.
         if self.linkto is not None:
-            if os.path.exists(self.fullpath):
+            if self.stat is not None or guess or os.path.exists(
+                    self.fullpath):
                 return 'link'
             else:
                 return 'brokenlink'
         elif self.is_DIR:
             return 'dir'
-        elif os.access(self.fullpath, os.X_OK):
+        elif self.stat is not None:
+            return 'exe' if LocalFS.is_executable(self.stat) else 'file'
+        elif not guess and os.access(self.fullpath, os.X_OK):
             return 'exe'
         else:
             return 'file'
 
+    def refresh_highlight(self):
+        """ Decide the highlight again, e.g. when the stat information is
+        loaded. The highlight of picked/cut/copied nodes is kept. """
+        highlight = self.decide_hi()
+        if self.state == Node.State.NORMAL:
+            self.set_highlight(highlight)
+        self.ori_highlight = highlight
+
+    def sort_key(self):
+        """ Return the key ordering the node among its siblings (see
+        NetRangerBuf.sort_nodes): directories first, then SortUI.sort_fn and
+        then the name. The key is cached until the stat information, the name
+        or the sort option changes. """
+        key = self._sort_key
+        if key is None or key[0] != SortUI.sort_fn_ch:
+            sort_fn = SortUI.get_sort_fn()
+            key = self._sort_key = (SortUI.sort_fn_ch,
+                                    (not self.is_DIR, sort_fn(self),
+                                     self.name))
+        return key[1]
+
+    def invalidate_sort_key(self):
+        self._sort_key = None
+
     def rename(self, name):
         ori = self.fullpath
         dirname = os.path.dirname(self.fullpath)
         self.fullpath = os.path.join(dirname, name)
         self.name = name
+        self._sort_key = None
+        self._render_cache = None
         return ori
 
     def change_dirname(self, oridirname, dirname):
         self.fullpath = os.path.join(dirname,
                                      self.fullpath[len(oridirname) + 1:])
+        self._render_cache = None
 
     def toggle_pick(self):
         if self.state == Node.State.NORMAL:
@@ -305,6 +465,8 @@ class EntryNode(Node):
 
 class DirNode(EntryNode):
     """Content node for directory."""
+    __slots__ = ('expanded', )
+
     def __init__(self, *args, **kwargs):
         self.expanded = False
         super(DirNode, self).__init__(*args, **kwargs)
@@ -320,14 +482,67 @@ class NetRangerBuf(object):
     Each netranger buffer corresponds to a directory and keeps a list of
     file/directory nodes and display them in a vim buffer.
     """
+    @property
+    def nodes(self):
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes):
+        if NETRApi.BatchHookers and self._nodes:
+            kept = set(id(n) for n in nodes)
+            self._evict_batch_hooker_segments(
+                [n for n in self._nodes if id(n) not in kept])
+        self._nodes = nodes
+        self._on_nodes_changed()
+
+    def _on_nodes_changed(self):
+        """ Must be called after modifying self.nodes in place. """
+        self._node_table = None
+
+    def _evict_batch_hooker_segments(self, removed):
+        """ Drop the batch hooker segments of nodes removed from the buffer.
+        """
+        if NETRApi.BatchHookers:
+            NETRApi.evict_batch_hookers(n for n in removed if not n.is_INFO)
+
+    def cleanup(self):
+        """ Release the resources of the buffer when it is wiped out. """
+        self._evict_batch_hooker_segments(self._nodes)
+        for path in list(self._watched_dirs):
+            self._unwatch(path)
+
+    @property
+    def node_table(self):
+        """ The NodeTable of self.nodes, built on demand. """
+        if self._node_table is None:
+            self._node_table = NodeTable(self._nodes)
+        return self._node_table
+
     @property
     def highlight_content(self):
-        return [n.highlight_content for n in self.nodes]
+        return self.render_nodes(self.nodes)
+
+    def render_nodes(self, nodes):
+        """ Return the highlight_content of nodes. Batch hookers (see
+        NETRApi.RegisterBatchHooker) are called once for all of them. The
+        entries of directories are counted for their size column. """
+        self._request_missing_child_counts(nodes)
+        if NETRApi.BatchHookers:
+            NETRApi.prefetch_batch_hookers([n for n in nodes if not n.is_INFO])
+        return [n.highlight_content for n in nodes]
 
     @property
     def plain_content(self):
         return [n.name for n in self.nodes]
 
+    @property
+    def virtual_content(self):
+        """ Cheap placeholder lines for virtual rendering. See _redraw. """
+        nodes = self.nodes
+        return [nodes[0].highlight_content] + [
+            '  ' * n.level + n.name for n in nodes[1:-1]
+        ] + [nodes[-1].highlight_content]
+
     @property
     def cur_node(self):
         return self.nodes[self.clineno]
@@ -352,32 +567,81 @@ class NetRangerBuf(object):
         self.last_vim_pwd = self.wd
         self.fs = fs
         self._num_fs_op = 0
-        self._pending_on_cursormoved_post = 0
+        # The timer of the pending on_cursormoved_post (see
+        # debounce_on_cursormoved_post).
+        self._cursormoved_timer = None
         self._last_on_curosormoved_lineno = -1
 
         self.content_outdated = False
+        # _highlight_outdated: all lines need to be redrawn.
+        # _highlight_outdated_nodes: only the lines of these nodes do.
         self._highlight_outdated = False
+        self._highlight_outdated_nodes = set()
         self._sort_outdated = False
 
+        self._lazy_stat = Vim.Var('NETRLazyLoadStat')
+        self._num_pending_stat = 0
+        self._pending_child_count = set()
+        self._stat_sort_outdated = False
+
+        # The DirCache is only used when it can be revalidated in the
+        # background.
+        self._dir_cache = None
+        if not fs.is_remote and controler.stat_pool.is_async:
+            self._dir_cache = controler.dir_cache
+        self._dir_cache_snapshots = {}
+
+        # See create_nodes and on_stream_listing.
+        self._stream = None
+        stream = Vim.Var('NETRStreamListing') and Vim.has_async_timer\
+            and not fs.is_remote
+
         if Vim.Var('NETRAutochdir'):
             Vim.command('lcd ' + wd)
 
+        # Directories watched by the controler's InotifyWatcher. Their mtime
+        # is not polled in update_nodes_and_redraw.
+        self._watched_dirs = set()
+        self._watch(wd)
+
         self._header_node = HeaderNode(wd)
         self._footer_node = FooterNode()
-        self.nodes = self.nodes_plus_header_footer(self.create_nodes(self.wd))
+        self._nodes = []
+        self.nodes = self.nodes_plus_header_footer(
+            self.create_nodes(self.wd, stream=stream))
 
         self.clineno = 1
-        self.nodes[self.clineno].cursor_on()
         # For lazy redraw in update_nodes_and_redraw, we detect the mtime
         # change of the working directory and all expanded subdirectories.
         self._expanded_nodes = set([self._header_node])
         self._pseudo_header_lineno = None
         self._pseudo_footer_lineno = None
+        # If set, the header/footer are shown in winbar/statusline instead of
+        # the pseudo header/footer lines.
+        self._header_footer_bar = Vim.Var('NETRHeaderFooterBar')
+        self._bar_content = {}
 
         self.winwidth = Vim.CurWinWidth()
         self.is_editing = False
         self._vim_buf_handle = Vim.current.buffer
+        # All writes to the vim buffer go through _buf_writer, which only
+        # sends the changed lines.
+        # With the extmark backend, the highlights of the written lines are
+        # applied by the writer as well.
+        self._buf_writer = BufWriter(
+            self._vim_buf_handle,
+            highlight.applier(self._vim_buf_handle.number)
+            if highlight.backend == 'extmark' else None)
+        # In virtual rendering mode (see _redraw), a bytearray flagging the
+        # lines holding highlight_content. None otherwise.
+        self._rendered_lines = None
         self._redraw()
+        if self._header_footer_bar:
+            self._set_bar_content('_NETRHeader', self._header_node.name)
+        self._request_visible_stat()
+        if self._stream is not None:
+            self.inc_num_fs_op()
+            self._schedule_stream_listing()
 
     def fs_busy(self, echo=True):
         """
@@ -421,35 +685,90 @@ class NetRangerBuf(object):
 
     def redraw_header_content(self):
         self._header_node.name = self.abbrev_cwd(self.winwidth).strip()
-        self._vim_buf_handle[0] = self._header_node.highlight_content
+        self._buf_writer[0] = self._header_node.highlight_content
+        if self._header_footer_bar:
+            self._set_bar_content('_NETRHeader', self._header_node.name)
 
     def redraw_footer_content(self):
-        """ Set the buffer's last line to the footer node's content. """
+        """ Set the buffer's last line (or the status line, see
+        g:NETRHeaderFooterBar) to the footer node's content. """
         meta = ''
         cur_node = self.cur_node
         if not cur_node.is_INFO:
-            cur_node.re_stat()
+            self._revalidate_stat(cur_node)
             meta = f' {cur_node.acl} {cur_node.user} {cur_node.group} {cur_node.mtime}'
         self._footer_node.name = meta.strip()
-        self._vim_buf_handle[-1] = self._footer_node.highlight_content
+        if self._header_footer_bar:
+            self._set_bar_content('_NETRFooter', self._footer_node.name)
+        else:
+            self._buf_writer[-1] = self._footer_node.highlight_content
+
+    def _revalidate_stat(self, node):
+        """ Stat node again if its stat information is older than
+        g:NETRFooterStatTTL. With the async StatPool, the footer keeps the
+        cached information meanwhile and is redrawn by on_revalidate_stat only
+        if the information changed. """
+        if node.stat_pending:
+            self._request_stat([node], priority=0)
+            return
+        now = time.monotonic()
+        if now - node.stat_time < Vim.Var('NETRFooterStatTTL') / 1000:
+            return
+        # Don't request again while the request is running.
+        node.stat_time = now
+        pool = self._controler.stat_pool
+        pool.submit(('revalidate', node), LocalFS.stat_info,
+                    (node.fullpath, ), self.on_revalidate_stat, 0)
+        if pool.is_async:
+            self._controler.schedule_stat_pool_poll()
+
+    def on_revalidate_stat(self, results):
+        """ Apply the results of _revalidate_stat and redraw the nodes
+        whose stat information changed. """
+        updated = []
+        for (_, node), res in results:
+            if isinstance(res, Exception):
+                res = (None, None)
+            if node.stat_pending or node.same_stat(*res):
+                continue
+            node.set_stat(*res)
+            node.refresh_highlight()
+            updated.append(node)
+        self._redraw_stat_updated_nodes(updated)
+
+    def _set_bar_content(self, name, content):
+        """ Set the buffer variable shown in winbar/statusline (see
+        netranger#bar#check). The buffer itself is not modified. """
+        if self._bar_content.get(name) == content:
+            return
+        self._bar_content[name] = content
+        self._vim_buf_handle.vars[name] = content
+        if self._vim_buf_handle.number == Vim.current.buffer.number:
+            Vim.command('redrawstatus')
 
-    def redraw_pedueo_header_footer(self):
+    def _restore_pseudo_header_footer(self):
         # Recover content for the last line occupied by pseudo header/footer
         # ignore error when buffer no longer has the first/last line
         if self._pseudo_header_lineno is not None:
             try:
-                self._vim_buf_handle[self._pseudo_header_lineno] = self.nodes[
+                self._buf_writer[self._pseudo_header_lineno] = self.nodes[
                     self._pseudo_header_lineno].highlight_content
             except IndexError:
                 pass
 
         if self._pseudo_footer_lineno is not None:
             try:
-                self._vim_buf_handle[self._pseudo_footer_lineno] = self.nodes[
+                self._buf_writer[self._pseudo_footer_lineno] = self.nodes[
                     self._pseudo_footer_lineno].highlight_content
             except IndexError:
                 pass
 
+    def redraw_pedueo_header_footer(self):
+        # The header/footer are always visible in winbar/statusline.
+        if self._header_footer_bar:
+            return
+        self._restore_pseudo_header_footer()
+
         # if current line is at the header/footer we need to keep the current
         # line to be the 2nd/penultimate visible line
         first_visible_line = int(Vim.eval('line("w0")')) - 1
@@ -467,80 +786,532 @@ class NetRangerBuf(object):
         # Set the pseudo header/footer
         if first_visible_line > 0:
             self._pseudo_header_lineno = first_visible_line
-            self._vim_buf_handle[
+            self._buf_writer[
                 first_visible_line] = self._header_node.highlight_content
         else:
             self._pseudo_header_lineno = None
 
         if last_visible_line < len(self._vim_buf_handle) - 1:
             self._pseudo_footer_lineno = last_visible_line
-            self._vim_buf_handle[
+            self._buf_writer[
                 last_visible_line] = self._footer_node.highlight_content
         else:
             self._pseudo_footer_lineno = None
 
-    def create_nodes(self, wd, level=0):
-        nodes = self._create_nodes_with_file_names(self.fs.ls(wd), wd, level)
+    def create_nodes(self, wd, level=0, stream=False):
+        """ Return the sorted nodes of files in wd. If stream is True, only
+        the entries fitting in the window are read and the rest are appended
+        by on_stream_listing. """
+        entries = None
+        if self._dir_cache is not None:
+            entries = self._dir_cache.load(wd)
+            self._refresh_dir_cache(wd, entries)
+        if entries is None and stream:
+            self._stream = self.fs.scandir_chunks(
+                wd, int(Vim.eval('winheight(0)')), stream_listing_chunk_size)
+            nodes = self._create_nodes_with_dir_entries(
+                next(self._stream, []), wd, level)
+        elif entries is None:
+            nodes = self._create_nodes_with_dir_entries(
+                self.fs.scandir(wd), wd, level)
+        else:
+            nodes = self._create_nodes_with_dir_entries(entries,
+                                                        wd,
+                                                        level,
+                                                        lazy=False)
         return self.sort_nodes(nodes)
 
-    def _create_nodes_with_file_names(self, files, dirpath, level):
-        """ Return the nodes for given filenames. """
-        files = [f for f in files if not self._controler.should_ignore(f)]
-        return [self.create_node(dirpath, f, level) for f in files]
+    def _create_nodes_with_dir_entries(self,
+                                       entries,
+                                       dirpath,
+                                       level,
+                                       lazy=None):
+        """ Return the nodes for given os.DirEntry objects. """
+        if lazy is None:
+            lazy = self._lazy_stat
+        should_ignore = self._controler.should_ignore
+        nodes = [
+            self.create_node(dirpath, e.name, level, dir_entry=e, lazy=lazy)
+            for e in entries if not should_ignore(e.name)
+        ]
+        if lazy:
+            self._request_stat(nodes)
+        return nodes
+
+    def _watch(self, path):
+        """ Watch directory path for changes. See apply_fs_events. """
+        if not self.fs.is_remote and self._controler.watch_dir(self, path):
+            self._watched_dirs.add(path)
+
+    def _unwatch(self, path):
+        if path in self._watched_dirs:
+            self._watched_dirs.discard(path)
+            self._controler.unwatch_dir(self, path)
+
+    def on_watch_gone(self, path):
+        """ Called when the watched directory path is deleted or moved. The
+        nodes of a subdirectory are removed by the event of its parent. """
+        self._watched_dirs.discard(path)
+        if path == self.wd:
+            self.content_outdated = True
+
+    def apply_fs_events(self, dirpath, changes):
+        """ Update the nodes for the entries created or deleted in dirpath,
+        where changes maps entry names to True (created) or False (deleted).
+        The update is deferred to update_nodes_and_redraw (by setting
+        content_outdated) if the buffer is not current or busy.
+        """
+        if self.is_editing or self._stream is not None\
+                or self.fs_busy(echo=False)\
+                or self._vim_buf_handle.number != Vim.current.buffer.number:
+            self.content_outdated = True
+            return
 
-    def create_node(self, dirname, basename, level):
+        if dirpath == self.wd:
+            beg, end, level = 1, len(self.nodes) - 1, 0
+        else:
+            ind = self.node_table.path_index(dirpath)
+            if ind < 0:
+                return
+            node = self.nodes[ind]
+            if not node.is_DIR or not node.expanded:
+                return
+            beg, end, level = ind + 1, self.next_lesseq_level_ind(ind),\
+                node.level + 1
+
+        table = self.node_table
+        nodes = self.nodes
+        siblings = {nodes[i].name: i for i in table.sibling_inds(beg, end)}
+
+        removed = []
+        created = []
+        should_ignore = self._controler.should_ignore
+        for name, is_created in changes.items():
+            if is_created:
+                if name not in siblings and not should_ignore(name)\
+                        and os.path.lexists(os.path.join(dirpath, name)):
+                    created.append(
+                        self.create_node(dirpath, name, level, lazy=False))
+            elif name in siblings:
+                ind = siblings[name]
+                removed.append((ind, min(table.next_lesseq_level_ind(ind),
+                                         end)))
+
+        self._apply_node_changes(removed, [(beg, end, created)]
+                                 if created else [])
+
+    def _schedule_stream_listing(self):
+        Vim.Timer(0, self._controler.on_stream_listing,
+                  'ranger.on_stream_listing', self._vim_buf_handle.number)
+
+    def on_stream_listing(self):
+        """ Append the nodes of the next chunk of entries from create_nodes.
+        When all entries are read, sort all nodes, keeping the cursor on the
+        same node unless the cursor was never moved. The buffer is locked by
+        inc_num_fs_op meanwhile. """
+        if self.is_editing:
+            return self._schedule_stream_listing()
+
+        chunk = next(self._stream, None)
+        if chunk is not None:
+            nodes = self.sort_nodes(
+                self._create_nodes_with_dir_entries(chunk, self.wd, 0))
+            end = len(self.nodes) - 1
+            self.nodes[end:end] = nodes
+            self._on_nodes_changed()
+            if self._rendered_lines is not None:
+                self._rendered_lines[end:end] = b'\x01' * len(nodes)
+            with self.SetBufferApiGuard():
+                self._buf_writer[end:end] = self.render_nodes(nodes)
+                if self._vim_buf_handle.number == Vim.current.buffer.number:
+                    self.redraw_pedueo_header_footer()
+            return self._schedule_stream_listing()
+
+        self._stream = None
+        self.dec_num_fs_op()
+        # Sorted when entered again if not the current buffer.
+        self._sort_prep()
+        if self._vim_buf_handle.number != Vim.current.buffer.number:
+            return
+        ori_clineno = self.clineno
+        self.sort()
+        if ori_clineno == 1:
+            self.set_clineno_by_lineno(1)
+        self._request_visible_stat()
+
+    def _refresh_dir_cache(self, wd, entries):
+        """ Scan wd and update its DirCache file in the background. If the
+        buffer is built from the cached entries, the nodes are revalidated
+        against the scan result in on_dir_cache_refresh. """
+        if entries is not None:
+            self._dir_cache_snapshots[wd] = {
+                e.name: e.record
+                for e in entries
+            }
+        pool = self._controler.stat_pool
+        pool.submit((wd, self), self._dir_cache.refresh, (wd, ),
+                    self.on_dir_cache_refresh, 2)
+        self._controler.schedule_stat_pool_poll()
+
+    def on_dir_cache_refresh(self, results):
+        """ Compare the scan results of _refresh_dir_cache with the cached
+        entries the nodes are built from. Changed stat information is applied
+        to the nodes in place. Added or removed entries mark the buffer as
+        content_outdated. """
+        updated = []
+        nodes_by_path = None
+        for (wd, _), records in results:
+            snapshot = self._dir_cache_snapshots.pop(wd, None)
+            if snapshot is None or isinstance(records, Exception):
+                continue
+            fresh = {r[0]: r for r in records}
+            if fresh.keys() != snapshot.keys():
+                self.content_outdated = True
+                continue
+            for name, record in fresh.items():
+                if DirCache.same_record(record, snapshot[name]):
+                    continue
+                if nodes_by_path is None:
+                    nodes_by_path = {n.fullpath: n for n in self.nodes}
+                node = nodes_by_path.get(os.path.join(wd, name))
+                if node is None or node.is_INFO:
+                    continue
+                node.set_stat(*DirCache.record_stat_info(record))
+                node.refresh_highlight()
+                updated.append(node)
+
+        self._redraw_stat_updated_nodes(updated)
+        if self.content_outdated and self._vim_buf_handle.valid\
+                and self._vim_buf_handle.number == Vim.current.buffer.number\
+                and not self.is_editing:
+            self.update_nodes_and_redraw()
+
+    def create_node(self,
+                    dirname,
+                    basename,
+                    level,
+                    dir_entry=None,
+                    lazy=None):
         """ Return the node for the given filename. """
+        if lazy is None:
+            lazy = self._lazy_stat
         fullpath = os.path.join(dirname, basename)
-        if os.path.isdir(fullpath):
-            return DirNode(fullpath, basename, level=level, buf=self)
+        if dir_entry is None:
+            is_dir = os.path.isdir(fullpath)
         else:
-            return EntryNode(fullpath, basename, level=level, buf=self)
-
-    def _create_nodes_if_not_exist(self, nodes, dirpath, level,
-                                   cheap_remote_ls):
-        """ Return missing nodes in dirpath that is not in input nodes. """
-        old_paths = set([node.fullpath for node in nodes])
-        new_paths = set([
-            os.path.join(dirpath, name)
-            for name in self.fs.ls(dirpath, cheap_remote_ls)
-        ])
-        file_names = [
-            os.path.basename(path) for path in new_paths.difference(old_paths)
-        ]
-        return self._create_nodes_with_file_names(file_names, dirpath, level)
-
-    def _sync_nodes_from_fs(self, wd, nodes, level, cheap_remote_ls):
-        res = self._create_nodes_if_not_exist(self.nodes, wd, level,
-                                              cheap_remote_ls)
+            try:
+                is_dir = dir_entry.is_dir()
+            except OSError:
+                is_dir = False
+
+        if is_dir:
+            return DirNode(fullpath,
+                           basename,
+                           level=level,
+                           buf=self,
+                           dir_entry=dir_entry,
+                           lazy=lazy)
+        else:
+            return EntryNode(fullpath,
+                             basename,
+                             level=level,
+                             buf=self,
+                             dir_entry=dir_entry,
+                             lazy=lazy)
+
+    def _request_stat(self, nodes, priority=1):
+        """ Load the stat information of nodes by the controler's StatPool.
+        The lines of the nodes are redrawn in on_node_stat when the results
+        arrive. A smaller priority is served earlier.
+        """
+        pool = self._controler.stat_pool
+        for node in nodes:
+            if not node.stat_pending:
+                node.stat_pending = True
+                self._num_pending_stat += 1
+            pool.submit(node, LocalFS.stat_info, (node.fullpath, ),
+                        self.on_node_stat, priority)
+
+        if pool.is_async and nodes:
+            self._stat_sort_outdated = True
+            self._controler.schedule_stat_pool_poll()
+
+    def _request_visible_stat(self):
+        """ Move the stat requests of nodes in the visible lines to the
+        front of the StatPool queue. """
+        if self._num_pending_stat == 0:
+            return
+        beg = int(Vim.eval('line("w0")')) - 1
+        end = int(Vim.eval('line("w$")'))
+        self._request_stat([
+            n for n in self.nodes[beg:end]
+            if not n.is_INFO and n.stat_pending
+        ],
+                           priority=0)
+
+    def on_node_stat(self, results):
+        """ Apply the results of _request_stat and redraw the affected lines.
+        """
+        updated = []
+        for node, res in results:
+            if not node.stat_pending:
+                continue
+            node.stat_pending = False
+            self._num_pending_stat -= 1
+            if isinstance(res, Exception):
+                res = (None, None)
+            node.set_stat(*res)
+            node.refresh_highlight()
+            updated.append(node)
+        self._redraw_stat_updated_nodes(updated)
+
+    def _request_missing_child_counts(self, nodes):
+        """ Request the entry count of the directories among nodes whose size
+        column shows the placeholder (see LocalFS.size_str). """
+        counts = LocalFS.child_counts
+        pending = self._pending_child_count
+        for node in nodes:
+            if node.is_DIR and node.stat is not None\
+                    and node not in pending\
+                    and counts.get(node.fullpath, node.st_mtime_ns) is None:
+                self.request_child_count(node)
+
+    def request_child_count(self, node):
+        """ Count the entries of a directory node in the background for its
+        size column. See LocalFS.size_str. """
+        pool = self._controler.stat_pool
+        self._pending_child_count.add(node)
+        pool.submit((node, node.stat.st_mtime_ns), LocalFS.count_children,
+                    (node.fullpath, ), self.on_child_count)
+        if pool.is_async:
+            self._stat_sort_outdated = True
+            self._controler.schedule_stat_pool_poll()
+
+    def on_child_count(self, results):
+        """ Apply the results of request_child_count and redraw the affected
+        lines. """
+        updated = []
+        for (node, mtime_ns), res in results:
+            self._pending_child_count.discard(node)
+            if isinstance(res, Exception):
+                res = '?'
+            LocalFS.child_counts.set(node.fullpath, mtime_ns, res)
+            # Ignore outdated results if the node is stat again meanwhile.
+            if node.stat is not None and node.stat.st_mtime_ns == mtime_ns:
+                node.invalidate_sort_key()
+                node.invalidate_render_cache()
+                updated.append(node)
+        self._redraw_stat_updated_nodes(updated)
+
+    def _redraw_stat_updated_nodes(self, updated):
+        """ Redraw the nodes whose stat information is loaded in the
+        background. Sort again if all information is loaded and the sort
+        option depends on it. """
+        # In synchronous mode, the nodes are not in self.nodes yet and the
+        # caller will draw them.
+        if not self._controler.stat_pool.is_async\
+                or not self._vim_buf_handle.valid:
+            return
 
-        fs_files = set(self.fs.ls(wd, cheap_remote_ls))
-        ind = 0
-        sz = len(nodes)
-        while ind < sz:
+        if self.is_editing:
+            self._highlight_outdated = True
+        elif updated:
+            pseudo = (self._pseudo_header_lineno, self._pseudo_footer_lineno)
+            linenos = (self.node_table.index(n) for n in updated)
+            self.redraw_lines(
+                [i for i in linenos if i >= 0 and i not in pseudo])
+            if self.cur_node in updated\
+                    and self._vim_buf_handle.number == Vim.current.buffer.number:
+                with self.SetBufferApiGuard():
+                    self.redraw_footer_content()
+
+        if self._num_pending_stat == 0 and not self._pending_child_count\
+                and self._stat_sort_outdated:
+            self._stat_sort_outdated = False
+            if SortUI.sort_fn_ch in 'acms':
+                self._sort_prep()
+                if self._vim_buf_handle.number == Vim.current.buffer.number\
+                        and not self.is_editing:
+                    self.sort()
+
+    def _sync_nodes_from_fs(self, wd, beg, end, level, cheap_remote_ls,
+                            removed, created):
+        """ Compare self.nodes[beg:end], the subtree of wd, with the entries
+        of wd. Append to removed the [beg, end) range of each node (and its
+        subtree) that no longer exists or should be ignored. Append to created
+        (beg, end, nodes for new files). Expanded subdirectories are compared
+        recursively. """
+        nodes = self.nodes
+        table = self.node_table
+        should_ignore = self._controler.should_ignore
+        entries = self.fs.scandir(wd, cheap_remote_ls)
+        fs_files = set(e.name for e in entries)
+
+        old_names = set()
+        inds = table.sibling_inds(beg, end)
+        for ind, next_ind in zip(inds, list(inds[1:]) + [end]):
             cur_node = nodes[ind]
-
+            old_names.add(cur_node.name)
             # The children of an invalid node will all be invalid
-            # Hence, we will start with the next valid node
-            if self._controler.should_ignore(
-                    cur_node.name) or cur_node.name not in fs_files:
-                ind = self.next_lesseq_level_ind(ind, nodes=nodes)
-                continue
+            if should_ignore(cur_node.name) or cur_node.name not in fs_files:
+                removed.append((ind, next_ind))
+            elif cur_node.is_DIR and cur_node.expanded:
+                self._sync_nodes_from_fs(cur_node.fullpath, ind + 1,
+                                         next_ind, level + 1, cheap_remote_ls,
+                                         removed, created)
+
+        entries = [e for e in entries if e.name not in old_names]
+        if entries:
+            new_nodes = self._create_nodes_with_dir_entries(
+                entries, wd, level)
+            if new_nodes:
+                created.append((beg, end, new_nodes))
+
+    def _apply_node_changes(self, removed, created, force_redraw=False):
+        """ Remove the [beg, end) ranges of self.nodes in removed and add the
+        nodes in created, a list of (beg, end, nodes) where [beg, end) is the
+        subtree of the nodes' parent (see _sync_nodes_from_fs).
+
+        If only a few nodes change and the siblings are sorted, new nodes are
+        bisect-inserted into their siblings by the cached sort keys and only
+        the changed lines are written to the vim buffer. Otherwise, or if
+        force_redraw is True, the nodes are sorted and the buffer is redrawn.
+        """
+        nodes = self.nodes
+        for rm_beg, rm_end in removed:
+            for node in nodes[rm_beg:rm_end]:
+                if node.is_DIR and node.expanded:
+                    self._expanded_nodes.discard(node)
+                    self._unwatch(node.fullpath)
+            self._controler.remove_pick_cut_copy(self, nodes[rm_beg:rm_end])
+            self._evict_batch_hooker_segments(nodes[rm_beg:rm_end])
+
+        if not removed and not created and not force_redraw:
+            return
 
-            res.append(cur_node)
-            # Recursively update expanded subnodes
-            if cur_node.is_DIR and cur_node.expanded:
-                next_ind = self.find_next_ind(
-                    nodes, ind + 1, lambda beg, new: new.level < beg.level)
-                res += self._sync_nodes_from_fs(cur_node.fullpath,
-                                                nodes[ind + 1:next_ind],
-                                                level + 1, cheap_remote_ls)
-                ind = next_ind
-                continue
+        # The parents of the changed nodes show the number of their children
+        # and might need to be sorted again.
+        parents = self._changed_parent_inds(removed, created)
+        for ind in parents:
+            nodes[ind].re_stat()
 
-            ind += 1
+        ori_node = self.cur_node
+        ori_clineno = self.clineno
+        edits = None
+        if not force_redraw and all(
+                self._in_sibling_order(ind) for ind in parents):
+            edits = self._sorted_insert_edits(removed, created)
+
+        if edits is None:
+            # New nodes are put at the end of their parent's subtree so that
+            # sort_nodes sees them as children of the parent.
+            edits = [(beg, end, 0, []) for beg, end in removed] + [
+                (end, end, new_nodes[0].level, new_nodes)
+                for _, end, new_nodes in created
+            ]
+            nodes = list(nodes)
+            for beg, end, _, new_nodes in self._ordered_edits(edits):
+                nodes[beg:end] = new_nodes
+            self.nodes = self.nodes_plus_header_footer(
+                self.sort_nodes(nodes[1:-1]))
+            self._redraw()
+        else:
+            for hooker in NETRApi.Hookers['render_begin']:
+                hooker(self)
+
+            rendered = self._rendered_lines
+            with self.SetBufferApiGuard():
+                self._restore_pseudo_header_footer()
+                for beg, end, _, new_nodes in self._ordered_edits(edits):
+                    nodes[beg:end] = new_nodes
+                    if rendered is not None:
+                        rendered[beg:end] = b'\x01' * len(new_nodes)
+                    self._buf_writer[beg:end] = self.render_nodes(new_nodes)
+            self._on_nodes_changed()
+            self.redraw_lines(self._shifted_inds(parents, edits))
+
+            for hooker in NETRApi.Hookers['render_end']:
+                hooker(self)
 
+        self.set_clineno_by_node(ori_node, ori_clineno)
+        if self._vim_buf_handle.number == Vim.current.buffer.number:
+            with self.SetBufferApiGuard():
+                self.redraw_pedueo_header_footer()
+
+    def _changed_parent_inds(self, removed, created):
+        """ Return the indices of the directory nodes whose children are
+        removed or created (see _apply_node_changes), excluding the header.
+        """
+        table = self.node_table
+        res = set(beg - 1 for beg, _, _ in created)
+        res.update(table.prev_less_level_ind(beg) for beg, _ in removed)
+        res.discard(0)
+        res.discard(-1)
+        for beg, end in removed:
+            res.difference_update(range(beg, end))
         return res
 
+    def _in_sibling_order(self, ind):
+        """ Return whether nodes[ind] is still sorted with respect to its
+        previous and next siblings. """
+        nodes = self.nodes
+        node = nodes[ind]
+        table = self.node_table
+        keys = [node.sort_key()]
+        prev_ind = table.prev_lesseq_level_ind(ind)
+        if prev_ind > 0 and nodes[prev_ind].level == node.level:
+            keys.insert(0, nodes[prev_ind].sort_key())
+        next_ind = table.next_lesseq_level_ind(ind)
+        if next_ind < len(nodes) - 1 and nodes[next_ind].level == node.level:
+            keys.append(nodes[next_ind].sort_key())
+        if SortUI.reverse:
+            keys.reverse()
+        return keys == sorted(keys)
+
+    def _shifted_inds(self, inds, edits):
+        """ Return the indices of the nodes at inds after applying edits (see
+        _ordered_edits). The nodes must not be removed by the edits. """
+        return [
+            ind + sum(
+                len(new_nodes) - (end - beg)
+                for beg, end, _, new_nodes in edits if end <= ind)
+            for ind in inds
+        ]
+
+    def _sorted_insert_edits(self, removed, created):
+        """ Return the edits (see _ordered_edits) inserting the created nodes
+        into their sorted siblings and deleting the removed ranges. Return
+        None if too many nodes change or the nodes need to be sorted again.
+        """
+        num_changes = len(removed) + sum(len(c[2]) for c in created)
+        if self._sort_outdated or num_changes > incremental_update_max_changes:
+            return None
+
+        # Removed siblings are still sorted, so they need not be excluded
+        # from the bisection: their edits are applied before the insertions
+        # at the same index.
+        table = self.node_table
+        edits = [(beg, end, 0, []) for beg, end in removed]
+        for beg, end, new_nodes in created:
+            inds = table.sibling_insert_inds(beg, end, new_nodes,
+                                             EntryNode.sort_key,
+                                             SortUI.reverse)
+            level = new_nodes[0].level
+            for ind, node in inds:
+                if edits and edits[-1][:3] == (ind, ind, level):
+                    edits[-1][3].append(node)
+                else:
+                    edits.append((ind, ind, level, [node]))
+        return edits
+
+    def _ordered_edits(self, edits):
+        """ Return the edits (beg, end, level, nodes), each replacing
+        nodes[beg:end] by nodes, in the order they should be applied. Edits are
+        applied from the end of the list so that the indices of the others stay
+        valid. Among insertions at the same index, deeper nodes end up first
+        as they belong to the subtree before the index. """
+        return sorted(edits, key=lambda e: (e[0], e[1], -e[2]), reverse=True)
+
     def update_nodes_and_redraw(self,
                                 force_redraw=False,
                                 cheap_remote_ls=False):
@@ -557,7 +1328,12 @@ class NetRangerBuf(object):
            ignore, remove it from the node list so that it will be invisible
            next time.
         """
+        if self._stream is not None:
+            return
+
         for node in self._expanded_nodes:
+            if node.fullpath in self._watched_dirs:
+                continue
             if os.access(node.fullpath, os.R_OK):
                 ori_mtime = node.stat.st_mtime if node.stat else -1
                 node.re_stat()
@@ -570,33 +1346,14 @@ class NetRangerBuf(object):
 
         self.content_outdated = False
 
-        new_nodes = self._sync_nodes_from_fs(self.wd, self.non_info_nodes, 0,
-                                             cheap_remote_ls)
-
-        ori_node = self.cur_node
-        ori_clineno = self.clineno
-        self.nodes = self.nodes_plus_header_footer(self.sort_nodes(new_nodes))
-        self._redraw()
-        self.set_clineno_by_node(ori_node, ori_clineno)
-
-    def reverse_sorted_nodes(self, nodes):
-        """ Reverse the sorted nodes with regard to their levels. """
-        rev = []
-        prev_level = -1
-        cur_ind = 0
-        for node in nodes:
-            if node.level <= prev_level:
-                for i, n in enumerate(rev):
-                    if n.level == node.level:
-                        rev.insert(i, node)
-                        cur_ind = i + 1
-                        break
-            else:
-                rev.insert(cur_ind, node)
-                cur_ind += 1
-
-            prev_level = node.level
-        return rev
+        removed = []
+        created = []
+        self._sync_nodes_from_fs(self.wd, 1,
+                                 len(self.nodes) - 1, 0, cheap_remote_ls,
+                                 removed, created)
+        # A forced update (e.g. NETRedraw) redraws everything.
+        self._apply_node_changes(removed, created, force_redraw=force_redraw)
+        self.redraw_if_highlight_outdated()
 
     def _sort_prep(self):
         """ Mark the buffer as sort outdated so that it will be sorted when
@@ -605,79 +1362,90 @@ class NetRangerBuf(object):
         self._last_node_id = self.nodes[self.clineno]
 
     def sort(self):
-        """ Sort the nodes. """
+        """ Sort the nodes. The nodes are not stat again, sorting only uses
+        the cached sort keys (see EntryNode.sort_key). """
         if not self._sort_outdated:
             return
         self._sort_outdated = False
-        for node in self.nodes:
-            node.re_stat()
         self.nodes = self.nodes_plus_header_footer(
             self.sort_nodes(self.non_info_nodes))
         self._redraw()
         self.set_clineno_by_node(self._last_node_id)
 
     def sort_nodes(self, nodes):
-        """Sort the nodes by their path and SortUI.sort_fn.
-
-        Information of ancestor are accumulated for subnodes as prefix.
-        To sort directories before files, ' '(ascii 32) is put into the
-        prefix for directories and '~' (ascii 127) is put into the
-        prefix for files. An additional ' ' is put before ' ' or '~' to
-        handle tricky case like 'dir, dir/z, dir2', without which will
-        results in 'dir, dir2, dir/z'.
+        """Sort the nodes by their EntryNode.sort_key among siblings, keeping
+        each subtree right after its root.
         """
-        sort_fn = SortUI.get_sort_fn()
-        reverse = SortUI.reverse
-        sorted_nodes = []
-        prefix = ''
-        prefix_end_ind = [0]
-        for i in range(len(nodes)):
-            cur_node = nodes[i]
-
-            prev_node = nodes[i - 1]
-            if cur_node.level > prev_node.level:
-                # cur_node must be a DirNode, hence the same as in the folloing
-                # "cur_node.is_DIR" case
-                prefix += f'  {sort_fn(prev_node)}{prev_node.name}'
-                prefix_end_ind.append(len(prefix))
-            else:
-                prefix_end_ind = prefix_end_ind[:cur_node.level + 1]
-                prefix = prefix[:prefix_end_ind[-1]]
-            if cur_node.is_DIR:
-                sorted_nodes.append(
-                    (f'{prefix}  {sort_fn(cur_node)}{cur_node.name}',
-                     cur_node))
-            else:
-                sorted_nodes.append(
-                    (f'{prefix} ~{sort_fn(cur_node)}{cur_node.name}',
-                     cur_node))
-
-        sorted_nodes = sorted(sorted_nodes, key=lambda x: x[0])
-        sorted_nodes = [node[1] for node in sorted_nodes]
-        if reverse:
-            sorted_nodes = self.reverse_sorted_nodes(sorted_nodes)
-
-        return sorted_nodes
+        return NodeTable(nodes).tree_sorted(EntryNode.sort_key,
+                                            reverse=SortUI.reverse)
 
     def _redraw(self, plain=False):
-        """ Redraw the buffer.
-        Note that we delegate the job for rendering the forground highlight of
-        the cursor line to on_cursormoved by calling _move_vim_cursor.
-        """
+        """ Redraw the buffer and move the vim cursor to the cursor line. """
         for hooker in NETRApi.Hookers['render_begin']:
             hooker(self)
 
         with self.SetBufferApiGuard():
             if plain:
-                self._vim_buf_handle[:] = self.plain_content
+                self._rendered_lines = None
+                self._buf_writer[:] = self.plain_content
+            elif len(self.nodes) > Vim.Var('NETRVirtualRenderThreshold') > 0:
+                self._rendered_lines = bytearray(len(self.nodes))
+                self._rendered_lines[0] = self._rendered_lines[-1] = 1
+                self._buf_writer[:] = self.virtual_content
+                self.render_visible_lines()
             else:
-                self._vim_buf_handle[:] = self.highlight_content
+                self._rendered_lines = None
+                self._buf_writer[:] = self.highlight_content
         if self._vim_buf_handle.number is self._vim_buf_handle.number:
             self._move_vim_cursor(self.clineno)
+        self.redraw_cursor()
 
         for hooker in NETRApi.Hookers['render_end']:
             hooker(self)
 
+    def render_visible_lines(self, winid=None):
+        """ In virtual rendering mode, write highlight_content for the lines
+        visible in window winid (the current window by default) plus a margin
+        that are not rendered yet. """
+        rendered = self._rendered_lines
+        if rendered is None:
+            return
+
+        if winid is not None:
+            beg = int(Vim.eval(f'line("w0", {winid})')) - 1
+            end = int(Vim.eval(f'line("w$", {winid})'))
+        elif self._vim_buf_handle.number == Vim.current.buffer.number:
+            beg = int(Vim.eval('line("w0")')) - 1
+            end = int(Vim.eval('line("w$")'))
+        else:
+            beg = end = self.clineno
+        beg = max(beg - virtual_render_margin, 0)
+        end = min(end + virtual_render_margin, len(rendered),
+                  len(self._vim_buf_handle))
+
+        beg = rendered.find(0, beg, end)
+        if beg < 0:
+            return
+        with self.SetBufferApiGuard():
+            while 0 <= beg < end:
+                run_end = rendered.find(1, beg, end)
+                if run_end < 0:
+                    run_end = end
+                self._buf_writer[beg:run_end] = self.render_nodes(
+                    self.nodes[beg:run_end])
+                rendered[beg:run_end] = b'\x01' * (run_end - beg)
+                beg = rendered.find(0, run_end, end)
+
+    def _invalidate_rendered_lines(self):
+        """ Mark all lines except the header and footer as outdated in virtual
+        rendering mode and render the visible ones. Return False if not in
+        virtual rendering mode. """
+        if self._rendered_lines is None:
+            return False
+        self._rendered_lines[1:-1] = bytes(len(self._rendered_lines) - 2)
+        self.render_visible_lines()
+        return True
+
     def _move_vim_cursor(self, lineno):
         """ Will trigger on_cursormoved through CursorMoved autocmd. """
         Vim.command(f'call cursor({lineno + 1},1)')
@@ -685,11 +1453,12 @@ class NetRangerBuf(object):
     def on_cursormoved(self):
         """ Handle for CursorMoved autocmd.
 
-        1. Make the node in the previous cursor line background highlight.
-        2. Make the node in the current cursor line foreground highlight.
-        3. Set cline_no to the current cursor line.
-        4. Enforce throttling by avoiding calling on_cursormoved_post
-        frequently. See on_cursormoved_post for details.
+        1. Set cline_no to the current cursor line.
+        2. Move the cursor line highlight (see redraw_cursor). The buffer is
+        not written unless lines are scrolled into view in virtual rendering
+        mode.
+        The heavy-duty tasks are left to on_cursormoved_post, see
+        debounce_on_cursormoved_post.
         """
         new_lineno = int(Vim.eval("line('.')")) - 1
 
@@ -698,25 +1467,40 @@ class NetRangerBuf(object):
             Vim.command('normal! k')
             new_lineno -= 1
 
-        if new_lineno == self.clineno:
-            self.nodes[new_lineno].cursor_on()
-            self.redraw_lines([new_lineno])
-        else:
-            oc = self.clineno
-            self.clineno = new_lineno
-            if oc < len(self.nodes):
-                self.nodes[oc].cursor_off()
-            self.nodes[new_lineno].cursor_on()
-            self.redraw_lines([oc, new_lineno])
-        self._pending_on_cursormoved_post += 1
+        self.render_visible_lines()
+        self.clineno = new_lineno
+        self.redraw_cursor()
+
+    def debounce_on_cursormoved_post(self):
+        """ Call on_cursormoved_post g:NETRPreviewDelay milliseconds after
+        the last call. A single timer is restarted on each call, so that
+        moving the cursor in a row only costs one timer_stop/timer_start per
+        move and the heavy-duty tasks run once for the final position. """
+        bufnum = self._vim_buf_handle.number
+        self._cursormoved_timer = Vim.Debounce(
+            self._cursormoved_timer, Vim.Var('NETRPreviewDelay'),
+            self._controler.on_cursormoved_post, 'ranger.on_cursormoved_post',
+            bufnum)
+
+    def redraw_cursor(self):
+        """ Highlight the cursor line with the selected variant of its node's
+        highlight group. The highlight is a match of the current window (see
+        netranger#hl#cursor), the lines themselves are always rendered
+        without the cursor. Nothing is done if the buffer is not the current
+        one. """
+        if self._vim_buf_handle.number != Vim.current.buffer.number:
+            return
+        group = ''
+        if not self.is_editing and self.clineno < len(self.nodes):
+            node = self.nodes[self.clineno]
+            if not node.is_INFO:
+                group = node.vim_hi_group + 'Sel'
+        Vim.command(f"call netranger#hl#cursor({self.clineno + 1}, '{group}')")
 
     def on_cursormoved_post(self):
-        """ Run heavy-duty tasks for CursorMoved autocmd. Each
-        on_cursormoved_post is delayed by some time, if during this time, more
-        CursorMoved event happens, only the last event will be served. """
-        self._pending_on_cursormoved_post -= 1
-        if self._pending_on_cursormoved_post > 0:
-            return
+        """ Run heavy-duty tasks for CursorMoved autocmd. Called by the
+        timer of debounce_on_cursormoved_post. """
+        self._cursormoved_timer = None
 
         # The line self.vim_set_line... below triggers on_cursormoved event,
         # which in term triggers on_cursormoved_post. This test is to avoid
@@ -734,12 +1518,14 @@ class NetRangerBuf(object):
         if self._controler._is_previewing:
             self.preview_on()
 
+        self._request_visible_stat()
+
         with self.SetBufferApiGuard():
             self.redraw_header_content()
             self.redraw_footer_content()
             self.redraw_pedueo_header_footer()
-            self._vim_buf_handle[self.clineno] = self.nodes[
-                self.clineno].highlight_content
+            self._buf_writer[self.clineno] = self.render_nodes(
+                [self.nodes[self.clineno]])[0]
 
     def set_clineno_by_lineno(self, lineno):
         """ Set cursor line by number. """
@@ -747,53 +1533,68 @@ class NetRangerBuf(object):
 
     def set_clineno_by_path(self, path):
         """ Set cursor line by full path. """
-        for ind, node in enumerate(self.nodes):
-            if node.fullpath == path:
-                self._move_vim_cursor(ind)
-                break
+        ind = self.node_table.path_index(path)
+        if ind >= 0:
+            self._move_vim_cursor(ind)
 
     def set_clineno_by_node(self, node, ori_clineno=0):
         """ Set cursor line by node reference. """
-        if node in self.nodes:
-            index = self.nodes.index(node)
+        index = self.node_table.index(node)
+        if index >= 0:
             self._move_vim_cursor(index)
             self.clineno = index
         else:
             ori_clineno = min(ori_clineno, len(Vim.current.buffer) - 1)
             self._move_vim_cursor(ori_clineno)
             self.clineno = ori_clineno
+        self.redraw_cursor()
 
     def SetBufferApiGuard(self):
         """ Context for setting buffer content.
         1. Set/restore modifiable
         2. vim.buffer[...] = ... api might moves cursor of all windows
            displaying the buffer. We prevent this by save/restore all the
-           window cursor position.
+           window cursor position. The windows are looked up in the
+           controler's WinIndex.
         """
         class G(object):
             def __enter__(g):
                 self._vim_buf_handle.options['modifiable'] = True
                 g.win_cursor = []
-                for w in Vim.windows:
-                    if w.buffer == self._vim_buf_handle:
-                        g.win_cursor.append((w, w.cursor))
+                winids = self._controler.win_index.buf_wins(
+                    self._vim_buf_handle.number)
+                if winids:
+                    g.win_cursor = [[int(v) for v in c] for c in Vim.eval(
+                        f'netranger#win#cursors({winids})')]
                 return g
 
             def __exit__(g, type, value, traceback):
-                for w, c in g.win_cursor:
-                    w.cursor = (min(c[0], len(self._vim_buf_handle) - 1), c[1])
+                if g.win_cursor:
+                    Vim.command('call netranger#win#restore_cursors('
+                                f'{g.win_cursor})')
                 self._vim_buf_handle.options['modifiable'] = False
 
         return G()
 
     def redraw_lines(self, linenos):
-        """ Redraw the highlight of nodes by line numbers. """
-        sz = min(len(self.nodes), len(self._vim_buf_handle))
-
+        """ Redraw the highlight of nodes by line numbers. In virtual
+        rendering mode, lines not rendered yet are skipped. """
+        sz = min(len(self.nodes), len(self._buf_writer))
+        rendered = self._rendered_lines
+        if rendered is not None:
+            sz = min(sz, len(rendered))
+
+        inds = [
+            i for i in linenos
+            if i < sz and (rendered is None or rendered[i])
+        ]
+        lines = self.render_nodes([self.nodes[i] for i in inds])
         with self.SetBufferApiGuard():
-            for i in linenos:
-                if i < sz:
-                    self._vim_buf_handle[i] = self.nodes[i].highlight_content
+            for i, line in zip(inds, lines):
+                self._buf_writer[i] = line
+        # The highlight group of the cursor line might have changed.
+        if self.clineno in linenos:
+            self.redraw_cursor()
 
     def redraw_if_winwidth_changed(self, force=False):
         """ Redraw the buffer highlight if the window widhth changed. """
@@ -808,8 +1609,8 @@ class NetRangerBuf(object):
 
             with self.SetBufferApiGuard():
                 self.redraw_header_content()
-                for i, node in enumerate(self.nodes):
-                    self._vim_buf_handle[i] = node.highlight_content
+                if not self._invalidate_rendered_lines():
+                    self._buf_writer[:] = self.highlight_content
                 self.redraw_pedueo_header_footer()
 
     def reset_highlight(self, nodes):
@@ -818,15 +1619,31 @@ class NetRangerBuf(object):
         """
         for node in nodes:
             node.reset_highlight()
+        self._highlight_outdated_nodes.update(nodes)
+
+    def redraw_highlight(self):
+        """ Redraw the highlight of all nodes. """
         self._highlight_outdated = True
+        self.redraw_if_highlight_outdated()
 
     def redraw_if_highlight_outdated(self):
-        """ Redraw the highlight of nodes in highlight_outdated_nodes.
+        """ Redraw the highlight of nodes in highlight_outdated_nodes, or of
+        all nodes if the whole buffer is highlight outdated.
         """
         if self._highlight_outdated:
-            with self.SetBufferApiGuard():
-                self._vim_buf_handle[:] = self.highlight_content
+            if not self._invalidate_rendered_lines():
+                with self.SetBufferApiGuard():
+                    self._buf_writer[:] = self.highlight_content
             self._highlight_outdated = False
+            self._highlight_outdated_nodes = set()
+        elif self._highlight_outdated_nodes:
+            outdated = self._highlight_outdated_nodes
+            self._highlight_outdated_nodes = set()
+            pseudo = (self._pseudo_header_lineno, self._pseudo_footer_lineno)
+            self.redraw_lines([
+                i for i, n in enumerate(self.nodes)
+                if n in outdated and i not in pseudo
+            ])
 
     def redraw_cur_line(self):
         """ Redraw the highlight of the current node. """
@@ -940,6 +1757,7 @@ class NetRangerBuf(object):
         try:
             node.expanded = True
             self._expanded_nodes.add(node)
+            self._watch(node.fullpath)
             if level == 1:
                 return self.create_nodes(node.fullpath, node.level + 1)
             else:
@@ -965,19 +1783,25 @@ class NetRangerBuf(object):
             for i in range(self.clineno, end_ind):
                 if self.nodes[i].is_DIR and self.nodes[i].expanded:
                     self._expanded_nodes.remove(self.nodes[i])
+                    self._unwatch(self.nodes[i].fullpath)
             self._controler.remove_pick_cut_copy(
                 self, self.nodes[self.clineno + 1:end_ind])
+            self._evict_batch_hooker_segments(
+                self.nodes[self.clineno + 1:end_ind])
             del self.nodes[self.clineno + 1:end_ind]
             cur_node.expanded = False
         else:
             self.nodes[self.clineno + 1:self.clineno + 1] = self._expand_node(
                 self.cur_node, maxlevel)
+        self._on_nodes_changed()
         self._redraw()
 
     def edit(self):
         """ Enter edit mode. """
         self.is_editing = True
         self._redraw(plain=True)
+        # The user modifies the buffer from now on.
+        self._buf_writer.reset()
         for i, node in enumerate(self.nodes):
             Vim.command(f'call matchaddpos("{node.vim_hi_group}", [{i+1}])')
         Vim.command('setlocal buftype=acwrite')
@@ -1040,13 +1864,13 @@ class NetRangerBuf(object):
         """ Update the highlight of picked nodes to cut. """
         for node in nodes:
             node.cut()
-        self._highlight_outdated = True
+        self._highlight_outdated_nodes.update(nodes)
 
     def copy(self, nodes):
         """ Update the highlight of picked nodes to copy. """
         for node in nodes:
             node.copy()
-        self._highlight_outdated = True
+        self._highlight_outdated_nodes.update(nodes)
 
     def find_next_ind(self, nodes, ind, pred):
         """ Return the index of first next node that satisfies pred. """
@@ -1062,7 +1886,7 @@ class NetRangerBuf(object):
     def next_lesseq_level_ind(self, beg_ind, nodes=None):
         """ Return the index of the next node with less or equal indent. """
         if nodes is None:
-            nodes = self.nodes
+            return self.node_table.next_lesseq_level_ind(beg_ind)
         return self.find_next_ind(nodes, beg_ind,
                                   lambda beg, new: new.level <= beg.level)
 
@@ -1079,7 +1903,7 @@ class NetRangerBuf(object):
     def prev_lesseq_level_ind(self, beg_ind, nodes=None):
         """ Return the index of the previous node with less or equal indent. """
         if nodes is None:
-            nodes = self.nodes
+            return self.node_table.prev_lesseq_level_ind(beg_ind)
         return self.find_prev_ind(nodes, beg_ind,
                                   lambda beg, new: new.level <= beg.level)
 
@@ -1105,6 +1929,8 @@ class Netranger(object):
 
     def __init__(self):
         self.init_vim_variables()
+        highlight.init(Vim.Var('NETRHighlightBackend'))
+        strwidth.set_ambiwidth(Vim.eval('&ambiwidth'))
         self.init_keymaps()
 
         self._sudo = False
@@ -1122,8 +1948,28 @@ class Netranger(object):
         self._NetRangerBuf_init_winwidth = -1
         self._is_previewing = Vim.Var("NETRPreviewDefaultOn")
         self.preview = preview.Previewer()
+        self.win_index = WinIndex()
+        self.win_index.reset([
+            (int(winid), int(bufnr), Vim.buffers[int(bufnr)].name)
+            for winid, bufnr in Vim.eval(
+                'map(getwininfo(), {_, w -> [w.winid, w.bufnr]})')
+        ])
+        self.stat_pool = StatPool(
+            Vim.Var('NETRStatWorkers') if Vim.has_async_timer else 0)
+        self.watcher = None
+        self._watcher_timer = None
+        if Vim.Var('NETRWatchFS') and Vim.has_async_timer:
+            self.watcher = InotifyWatcher.create()
+        self.dir_cache = None
+        if Vim.Var('NETRDirCache'):
+            self.dir_cache = DirCache(
+                os.path.join(Vim.Var('NETRRootDir'), dir_cache_dirname),
+                Vim.Var('NETRDirCacheSize'))
+        self._stat_pool_poll_pending = False
         self._disable_on_winenter = False
         self._cur_search_buf = None
+        # The nodes listed in the search buffer.
+        self._search_nodes = None
         self._last_search_pattern = None
 
         Rclone.init(Vim.Var('NETRemoteCacheDir'), Vim.Var('NETRemoteRoots'))
@@ -1285,6 +2131,18 @@ class Netranger(object):
 
         return C()
 
+    def on_winbuf(self, winid, bufnum):
+        """ Handle for WinNew and BufWinEnter autocmd. See WinIndex. """
+        self.win_index.set(winid, bufnum, Vim.buffers[bufnum].name)
+
+    def on_buffile(self, bufnum):
+        """ Handle for BufFilePost autocmd. See WinIndex. """
+        self.win_index.rename_buf(bufnum, Vim.buffers[bufnum].name)
+
+    def on_winclosed(self, winid):
+        """ Handle for WinClosed autocmd. See WinIndex. """
+        self.win_index.remove(winid)
+
     def on_winenter(self, bufnum):
         """ Handle for WinEnter autocmd. """
         if self._disable_on_winenter:
@@ -1330,6 +2188,20 @@ class Netranger(object):
                 self.show_existing_buf(bufname)
             else:
                 self.gen_new_buf(bufname)
+            # Autocmds are not triggered by the buffer switch and renaming
+            # above as we are in an autocmd.
+            self.on_winbuf(int(Vim.eval('win_getid()')),
+                           Vim.current.buffer.number)
+
+    def on_bufwipeout(self, bufnum):
+        """ Handle for BufWipeout autocmd. Forget the NetRangerBuf of the
+        wiped out buffer. """
+        buf = self._bufs.pop(bufnum, None)
+        if buf is None:
+            return
+        if self._wd2bufnum.get(buf.wd) == bufnum:
+            del self._wd2bufnum[buf.wd]
+        buf.cleanup()
 
     def update_curbuf(self):
         """ Update an existing NetRangerBuf's nodes and highlight. """
@@ -1338,9 +2210,15 @@ class Netranger(object):
         # deal with content changed, e.g., file operation outside
         cur_buf.update_nodes_and_redraw()
 
+        # deal with sort option changed in other buffers
+        cur_buf.sort()
+
         # deal with highlight changed, e.g., pick, copy hi dismiss because of
         # paste
         cur_buf.redraw_if_highlight_outdated()
+        # The window might have shown another buffer (see
+        # netranger#hl#cursor_check).
+        cur_buf.redraw_cursor()
 
         # ensure pwd is correct
         if Vim.Var('NETRAutochdir'):
@@ -1400,7 +2278,7 @@ class Netranger(object):
             return buf.valid
         except KeyError:
             del self._wd2bufnum[wd]
-            del self._bufs[bufnum]
+            self._bufs.pop(bufnum, None)
             return False
 
     def set_buf_option(self):
@@ -1422,6 +2300,23 @@ class Netranger(object):
         Vim.command('setlocal concealcursor=nvc')
         Vim.command('setlocal nocursorline')
         Vim.command('setlocal nolist')
+        Vim.command('call netranger#bar#check()')
+
+    def schedule_stat_pool_poll(self):
+        """ Drain the results of stat_pool after a while. """
+        if self._stat_pool_poll_pending:
+            return
+        self._stat_pool_poll_pending = True
+        Vim.Timer(stat_pool_poll_interval, self.on_stat_pool_poll,
+                  'ranger.on_stat_pool_poll')
+
+    def on_stat_pool_poll(self):
+        """ Dispatch the finished stat_pool jobs and poll again if there are
+        unfinished jobs. """
+        self._stat_pool_poll_pending = False
+        self.stat_pool.drain()
+        if self.stat_pool.busy:
+            self.schedule_stat_pool_poll()
 
     def on_cursormoved(self, bufnum):
         """ Handle for CursorMoved.
@@ -1435,18 +2330,74 @@ class Netranger(object):
             if Vim.eval('mode()') == 'V':
                 return
             self._bufs[bufnum].on_cursormoved()
-            Vim.Timer(Vim.Var('NETRPreviewDelay'), self.on_cursormoved_post,
-                      'ranger.on_cursormoved_post', bufnum)
+            self._bufs[bufnum].debounce_on_cursormoved_post()
+
+    def watch_dir(self, buf, path):
+        """ Watch directory path for buf. Return False if the watcher is not
+        available or path can not be watched. """
+        if self.watcher is None or not self.watcher.watch(path, buf):
+            return False
+        if self._watcher_timer is None:
+            self._watcher_timer = Vim.TimerStart(fs_watch_interval,
+                                                 'ranger.on_fs_events')
+        return True
+
+    def unwatch_dir(self, buf, path):
+        self.watcher.unwatch(path, buf)
+        self._stop_watcher_timer_if_idle()
+
+    def _stop_watcher_timer_if_idle(self):
+        """ Stop polling the watcher if no directory is watched. The timer
+        is started again by watch_dir. """
+        if self._watcher_timer is not None and not self.watcher.watching:
+            Vim.TimerStop(self._watcher_timer)
+            self._watcher_timer = None
+
+    def on_fs_events(self):
+        """ Repeating timer callback dispatching the InotifyWatcher events to
+        the buffers watching the directories. """
+        overflow, changes, gone = self.watcher.read_events()
+        for path in gone:
+            for buf in self.watcher.owners(path):
+                buf.on_watch_gone(path)
+                self.watcher.unwatch(path, buf)
+
+        for path, entries in changes.items():
+            for buf in self.watcher.owners(path):
+                if not buf._vim_buf_handle.valid:
+                    self.watcher.unwatch_all(buf)
+                    continue
+                buf.apply_fs_events(path, entries)
+
+        if overflow:
+            # Some events are lost, resync all buffers.
+            for buf in self._bufs.values():
+                buf.content_outdated = True
+            if Vim.current.buffer.number in self._bufs:
+                self.cur_buf.update_nodes_and_redraw()
+
+        self._stop_watcher_timer_if_idle()
+
+    def on_stream_listing(self, bufnum):
+        """ Timer callback of NetRangerBuf.on_stream_listing. """
+        if bufnum in self._bufs:
+            self._bufs[bufnum].on_stream_listing()
+
+    def on_winscrolled(self, bufnum, winid):
+        """ Handle for WinScrolled: render the revealed lines. """
+        if bufnum in self._bufs:
+            self._bufs[bufnum].render_visible_lines(winid)
 
     def on_cursormoved_post(self, bufnum):
         """ Perform heavy-duty tasks for CursorMoved autocmd.
 
         We put all heavy-duty but not time-urgent tasks that we want to perform
         on CursorMoved over a node here. The heavy tasks might not even be
-        executed thanks to the throttling trick applied in
-        NetRangerBuf.on_cursormoved_post.
+        executed thanks to the debouncing in
+        NetRangerBuf.debounce_on_cursormoved_post.
         """
-        self._bufs[bufnum].on_cursormoved_post()
+        if bufnum in self._bufs:
+            self._bufs[bufnum].on_cursormoved_post()
 
     def pend_onuiquit(self, fn, num_args=0):
         """ Called by UIs to perform actions after reentering netranger buffer.
@@ -1988,16 +2939,20 @@ class Netranger(object):
         else:
             previewing_tab_num = -1
 
-        for tab in Vim.tabpages:
-            if tab.number == previewing_tab_num:
-                continue
-            for window in tab.windows:
-                if window.buffer.name == path:
-                    Vim.current.window = window
-                    return
+        winids = self.win_index.path_wins(path, self._buf_name)
+        if winids and Vim.eval(f'netranger#win#goto_first({winids}, '
+                               f'{previewing_tab_num})') == '1':
+            return
 
         Vim.command(f'tabedit {path}')
 
+    @staticmethod
+    def _buf_name(bufnr):
+        try:
+            return Vim.buffers[bufnr].name
+        except KeyError:
+            return None
+
     def _newtabdrop(self, path):
         num_tabpages = len(Vim.tabpages)
         if num_tabpages > 1:
@@ -2027,21 +2982,23 @@ class Netranger(object):
                              'ranger._NETRSearchUpdate')
         self._last_search_pattern = pattern
 
-        filtered_nodes = self._cur_search_buf.nodes[0:-1]
+        table = self._cur_search_buf.node_table
+        filtered_nodes = table.nodes[0:-1]
 
         ignore_case = False
         if pattern and pattern:
             if (Vim.options['smartcase'] and re.match(
                     '[A-Z]', pattern)) or not Vim.options['ignorecase']:
-                pattern = re.compile('.*' + pattern)
+                flags = 0
             else:
-                pattern = re.compile('.*' + pattern, re.IGNORECASE)
+                flags = re.IGNORECASE
                 ignore_case = True
-            filtered_nodes = [
-                n for n in filtered_nodes if pattern.match(n.name)
-            ]
+            filtered_nodes = table.filter_by_name(pattern, flags)
+            if filtered_nodes and filtered_nodes[-1] is table.nodes[-1]:
+                filtered_nodes.pop()
 
         Vim.current.buffer[:] = [n.name for n in filtered_nodes]
+        self._search_nodes = filtered_nodes
 
         Vim.command('call clearmatches()')
         for i, node in enumerate(filtered_nodes):
@@ -2063,13 +3020,18 @@ class Netranger(object):
     def _NETRSearchStop(self, accept):
         accept = accept and len(Vim.current.buffer[0])
         if accept:
-            accept_line_nr = [n.name for n in self._cur_search_buf.nodes
-                              ].index(Vim.current.line) + 1
-        Vim.command(f'{self._buf_num_before_search}b')
+            node = self._search_nodes[Vim.current.window.cursor[0] - 1]
+            accept_line_nr = self._cur_search_buf.node_table.index(node) + 1
+        # Drop the matches of the search buffer before the netranger buffer
+        # adds its cursor line match again (see NetRangerBuf.redraw_cursor).
         Vim.command('call clearmatches()')
+        Vim.command('unlet! w:_NETRCursorMatch')
+        Vim.command(f'{self._buf_num_before_search}b')
         if accept:
             Vim.command(f'execute {accept_line_nr}')
+        self.cur_buf.on_cursormoved()
         self._cur_search_buf = None
+        self._search_nodes = None
         self._last_search_pattern = None
         with self.cur_buf.SetBufferApiGuard():
             self.cur_buf.redraw_pedueo_header_footer()
@@ -0,0 +1,257 @@
+from __future__ import absolute_import
+
+import re
+from bisect import bisect_right
+
+
+class NodeTable(object):
+    """ Columnar view of a list of nodes (see NetRangerBuf.nodes).
+
+    Operations that would otherwise walk the nodes one by one in python run on
+    packed columns instead:
+        levels: bytes with one byte per node, scanned with bytes.find/rfind
+                and compiled byte patterns.
+        names: all names joined by newlines, filtered with a single regex
+               search over the whole buffer.
+        node/path index: the index of each node by identity and by fullpath,
+               so that finding the line of a node is a dict lookup.
+    Columns are built lazily and the table must be dropped when the node list
+    changes.
+    """
+    def __init__(self, nodes, levels=None):
+        self.nodes = nodes
+        self._levels = levels
+        self._names = None
+        self._name_offsets = None
+        self._node_inds = None
+        self._path_inds = None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def sub(self, beg, end):
+        """ Return the table of nodes[beg:end], sharing the packed levels. """
+        levels = self._levels
+        if levels is not None:
+            levels = levels[beg:end]
+        return NodeTable(self.nodes[beg:end], levels)
+
+    @property
+    def levels(self):
+        """ The levels of the nodes packed in bytes, or a list of ints if some
+        node is nested deeper than a byte can hold. """
+        if self._levels is None:
+            levels = [n.level for n in self.nodes]
+            try:
+                self._levels = bytes(levels)
+            except ValueError:
+                self._levels = levels
+        return self._levels
+
+    @property
+    def names(self):
+        if self._names is None:
+            names = [n.name for n in self.nodes]
+            self._names = '\n'.join(names)
+            offsets = []
+            offset = 0
+            for name in names:
+                offsets.append(offset)
+                offset += len(name) + 1
+            self._name_offsets = offsets
+        return self._names
+
+    def index(self, node):
+        """ Return the index of node (by identity), or -1 if it is not in
+        the table. """
+        if self._node_inds is None:
+            self._node_inds = {id(n): i for i, n in enumerate(self.nodes)}
+        return self._node_inds.get(id(node), -1)
+
+    def path_index(self, path):
+        """ Return the index of the first node whose fullpath is path, or -1
+        if there is none. Nodes can be renamed without changing the node list
+        (see EntryNode.rename), so the index is rebuilt if it is found stale.
+        """
+        inds = self._path_inds
+        if inds is not None:
+            ind = inds.get(path, -1)
+            if ind >= 0 and self.nodes[ind].fullpath == path:
+                return ind
+        inds = self._path_inds = {}
+        for i, node in enumerate(self.nodes):
+            inds.setdefault(node.fullpath, i)
+        return inds.get(path, -1)
+
+    def next_lesseq_level_ind(self, ind):
+        """ Return the index of the next node with less or equal level than
+        nodes[ind], or len(nodes) if there is none. """
+        return self._find_next_level_le(ind, self.levels[ind])
+
+    def next_less_level_ind(self, ind):
+        """ Return the index of the next node with less level than
+        nodes[ind], or len(nodes) if there is none. """
+        return self._find_next_level_le(ind, self.levels[ind] - 1)
+
+    def prev_lesseq_level_ind(self, ind):
+        """ Return the index of the previous node with less or equal level
+        than nodes[ind], or -1 if there is none. """
+        levels = self.levels
+        level = levels[ind]
+        if isinstance(levels, bytes):
+            return max(
+                levels.rfind(bytes((lv, )), 0, ind) for lv in range(level + 1))
+        ind -= 1
+        while ind > -1 and levels[ind] > level:
+            ind -= 1
+        return ind
+
+    def prev_less_level_ind(self, ind):
+        """ Return the index of the previous node with less level than
+        nodes[ind], or -1 if there is none. """
+        levels = self.levels
+        level = levels[ind]
+        if isinstance(levels, bytes):
+            return max([
+                levels.rfind(bytes((lv, )), 0, ind) for lv in range(level)
+            ] + [-1])
+        ind -= 1
+        while ind > -1 and levels[ind] >= level:
+            ind -= 1
+        return ind
+
+    def _find_next_level_le(self, ind, level):
+        levels = self.levels
+        sz = len(levels)
+        if level < 0:
+            return sz
+        if isinstance(levels, bytes):
+            m = _level_le_pattern(level).search(levels, ind + 1)
+            return m.start() if m else sz
+        ind += 1
+        while ind < sz and levels[ind] > level:
+            ind += 1
+        return ind
+
+    def tree_sorted(self, key, reverse=False):
+        """ Return the nodes sorted by key among siblings. Each node is
+        followed by its (sorted) subtree as in the original list. If reverse
+        is True, each group of siblings is in reversed order. """
+        res = []
+        if self.nodes:
+            self._sort_siblings(0, len(self.nodes), self.levels[0], key,
+                                reverse, res)
+        return res
+
+    def _sort_siblings(self, beg, end, level, key, reverse, res):
+        """ Sort the nodes in [beg, end), whose top level is level, into res.
+        """
+        nodes = self.nodes
+        groups = []
+        while beg < end:
+            nxt = min(self._find_next_level_le(beg, level), end)
+            groups.append((key(nodes[beg]), beg, nxt))
+            beg = nxt
+        groups.sort(key=lambda g: g[0])
+        if reverse:
+            groups.reverse()
+        for _, beg, nxt in groups:
+            res.append(nodes[beg])
+            if nxt > beg + 1:
+                self._sort_siblings(beg + 1, nxt, level + 1, key, reverse,
+                                    res)
+
+    def sibling_inds(self, beg, end):
+        """ Return the indices of the top level nodes in [beg, end), which
+        must be a range of siblings and their subtrees. """
+        if beg >= end:
+            return []
+        levels = self.levels
+        level = levels[beg]
+        if not isinstance(levels, bytes):
+            return [i for i in range(beg, end) if levels[i] == level]
+        if levels.count(level, beg, end) == end - beg:
+            return range(beg, end)
+        return [
+            m.start()
+            for m in _level_eq_pattern(level).finditer(levels, beg, end)
+        ]
+
+    def sibling_insert_inds(self, beg, end, nodes, key, reverse=False):
+        """ Return (index, node) pairs for inserting nodes among the top level
+        nodes in [beg, end) such that the siblings stay sorted by key (as in
+        tree_sorted). The pairs are in list order. The siblings are assumed to
+        be sorted and only O(log n) of their keys are computed.
+        """
+        table_nodes = self.nodes
+        starts = self.sibling_inds(beg, end)
+        sz = len(starts)
+        res = []
+        for node in sorted(nodes, key=key, reverse=reverse):
+            k = key(node)
+            lo, hi = 0, sz
+            while lo < hi:
+                mid = (lo + hi) // 2
+                mk = key(table_nodes[starts[mid]])
+                if (k < mk if reverse else mk < k):
+                    lo = mid + 1
+                else:
+                    hi = mid
+            res.append((starts[lo] if lo < sz else end, node))
+        return res
+
+    def filter_by_name(self, pattern, flags=0):
+        """ Return the nodes whose name matches (re.match) '.*' + pattern. All
+        names are searched at once. Matches spanning several names are
+        checked again against the single name they start in.
+
+        Patterns that might contain anchors or lookbehinds are matched name by
+        name, since their meaning changes in the joined names.
+        """
+        single = re.compile('.*' + pattern, flags)
+        names = self.names
+        offsets = self._name_offsets
+        nodes = self.nodes
+        if names.count('\n') != len(nodes) - 1\
+                or _position_dependent_pattern.search(pattern):
+            # Some name contains a newline or the pattern depends on the
+            # surrounding names.
+            return [n for n in nodes if single.match(n.name)]
+
+        joined = re.compile('^(?:.*' + pattern + ')', flags | re.MULTILINE)
+        res = []
+        pos = 0
+        while True:
+            m = joined.search(names, pos)
+            if m is None:
+                break
+            ind = bisect_right(offsets, m.start()) - 1
+            name_end = offsets[ind] + len(nodes[ind].name)
+            if m.end() <= name_end or single.match(nodes[ind].name):
+                res.append(nodes[ind])
+            pos = name_end + 1
+        return res
+
+
+# Matches the anchors ^, $, \A, \Z and lookbehinds. The check is
+# conservative: e.g. an escaped \$ or a [^...] class also matches.
+_position_dependent_pattern = re.compile(r'[\^$]|\\[AZ]|\(\?<[=!]')
+
+_level_le_patterns = {}
+
+
+def _level_le_pattern(level):
+    """ Return the compiled bytes pattern matching a level in [0, level]. """
+    if level not in _level_le_patterns:
+        _level_le_patterns[level] = re.compile(b'[\\x00-\\x%02x]' % level)
+    return _level_le_patterns[level]
+
+
+_level_eq_patterns = {}
+
+
+def _level_eq_pattern(level):
+    """ Return the compiled bytes pattern matching level. """
+    if level not in _level_eq_patterns:
+        _level_eq_patterns[level] = re.compile(re.escape(bytes((level, ))))
+    return _level_eq_patterns[level]
@@ -0,0 +1,102 @@
+from __future__ import absolute_import
+
+import heapq
+import itertools
+import threading
+from collections import defaultdict
+
+
+class StatPool(object):
+    """ A pool of worker threads running filesystem queries (stat, listdir,
+    ...) off the vim thread.
+
+    Jobs are identified by a key. Submitting a key that is still queued only
+    takes effect if the new priority is more urgent (smaller), so visible
+    lines can be moved to the front of the queue. Results are never handed to
+    the callbacks in the worker threads as the vim api is not thread safe.
+    Instead, the vim thread calls drain periodically. With num_workers=0, the
+    pool runs each job immediately in the caller thread.
+    """
+    def __init__(self, num_workers):
+        self.num_workers = num_workers
+        self._threads = []
+        self._cv = threading.Condition()
+        self._heap = []
+        self._latest = {}
+        self._results = []
+        self._num_running = 0
+        self._seq = itertools.count()
+
+    @property
+    def is_async(self):
+        return self.num_workers > 0
+
+    @property
+    def busy(self):
+        """ Return True if some jobs are not yet drained. """
+        with self._cv:
+            return bool(self._latest or self._results or self._num_running)
+
+    def submit(self, key, fn, args, on_done, priority=1):
+        """ Run fn(*args) in a worker thread. on_done is called in the vim
+        thread (by drain) with a list of (key, result) pairs, where result is
+        the return value of fn or the exception it raised. Jobs sharing the
+        same on_done are reported together.
+        """
+        if not self.is_async:
+            on_done([(key, self._run(fn, args))])
+            return
+
+        with self._cv:
+            if key in self._latest and self._latest[key][0] <= priority:
+                return
+            seq = next(self._seq)
+            self._latest[key] = (priority, seq)
+            heapq.heappush(self._heap, (priority, seq, key, fn, args, on_done))
+            self._cv.notify()
+        self._ensure_workers()
+
+    def drain(self):
+        """ Dispatch finished results to their callbacks. Must be called in
+        the vim thread. """
+        with self._cv:
+            results, self._results = self._results, []
+
+        groups = defaultdict(list)
+        for key, result, on_done in results:
+            groups[on_done].append((key, result))
+        for on_done, pairs in groups.items():
+            on_done(pairs)
+
+    def _run(self, fn, args):
+        try:
+            return fn(*args)
+        except Exception as e:
+            return e
+
+    def _ensure_workers(self):
+        if len(self._threads) >= self.num_workers:
+            return
+        for _ in range(self.num_workers - len(self._threads)):
+            t = threading.Thread(target=self._work, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _work(self):
+        while True:
+            with self._cv:
+                while not self._heap:
+                    self._cv.wait()
+                priority, seq, key, fn, args, on_done = heapq.heappop(
+                    self._heap)
+                # A more urgent job for the same key superseded this one.
+                if self._latest.get(key, (None, None))[1] != seq:
+                    continue
+                del self._latest[key]
+                self._num_running += 1
+
+            result = self._run(fn, args)
+
+            with self._cv:
+                self._num_running -= 1
+                self._results.append((key, result, on_done))
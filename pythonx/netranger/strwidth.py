@@ -0,0 +1,99 @@
+from __future__ import absolute_import
+
+import unicodedata
+
+from netranger.util import is_ascii
+
+# Display width of strings as computed by vim's strwidth(), without calling
+# vim for each string:
+#     - printable ASCII strings are as wide as they are long.
+#     - East Asian wide/fullwidth characters take two cells, ambiguous ones
+#       take two cells if 'ambiwidth' is double.
+#     - combining characters take no cell unless they start the string.
+# Characters whose width depends on vim's settings (e.g. control characters
+# displayed as ^X or <xx>) or on vim's own tables (symbols vim shows as wide
+# emoji, marks vim does or does not combine) are asked to vim once and cached.
+
+ambiwidth = 'single'
+_char_width_cache = {}
+_lead_char_width_cache = {}
+_width_cache = {}
+# The widths of non-ASCII names are cached. The cache is dropped when it grows
+# beyond this size.
+_max_cached_widths = 100000
+
+
+def set_ambiwidth(value):
+    """ Set the 'ambiwidth' option value the widths are computed for. """
+    global ambiwidth
+    if value != ambiwidth:
+        ambiwidth = value
+        _char_width_cache.clear()
+        _lead_char_width_cache.clear()
+        _width_cache.clear()
+
+
+def strwidth(s):
+    """ Return the number of display cells s occupies. """
+    if is_ascii(s) and s.isprintable():
+        return len(s)
+    res = _width_cache.get(s)
+    if res is None:
+        if len(_width_cache) >= _max_cached_widths:
+            _width_cache.clear()
+        res = _width_cache[s] = sum(char_widths(s))
+    return res
+
+
+def char_widths(s):
+    """ Return the display width of each character of s, where combining
+    characters are counted as part of the preceding character. """
+    if is_ascii(s) and s.isprintable():
+        return [1] * len(s)
+    res = [_char_width(c) for c in s]
+    if res and res[0] == 0:
+        res[0] = _lead_char_width(s[0])
+    return res
+
+
+def _char_width(c):
+    res = _char_width_cache.get(c)
+    if res is None:
+        res = _char_width_cache[c] = _compute_char_width(c)
+    return res
+
+
+def _lead_char_width(c):
+    """ Return the width of a combining character starting a string. """
+    res = _lead_char_width_cache.get(c)
+    if res is None:
+        res = _lead_char_width_cache[c] = _vim_strwidth(c)
+    return res
+
+
+def _vim_strwidth(s):
+    from netranger import Vim
+    return Vim.strwidth(s)
+
+
+def _compute_char_width(c):
+    if ' ' <= c < '\x7f':
+        return 1
+    category = unicodedata.category(c)
+    if category[0] == 'C' or category in ('Zl', 'Zp') or c <= '\xa0':
+        # Unprintable in vim or subject to 'isprint': ask vim.
+        return _vim_strwidth(c)
+    if category[0] == 'M':
+        # Vim's combining table differs from the Unicode categories (e.g.
+        # U+180B-U+180D), so ask vim how wide the mark is after a base char.
+        return _vim_strwidth('a' + c) - 1
+    eaw = unicodedata.east_asian_width(c)
+    if eaw in ('W', 'F'):
+        return 2
+    if category[0] == 'S':
+        # Vim shows many symbols of neutral or ambiguous East Asian width as
+        # wide emoji (e.g. U+261D, U+1F321) and regional indicators as wide.
+        return _vim_strwidth(c)
+    if eaw == 'A' and ambiwidth == 'double':
+        return 2
+    return 1
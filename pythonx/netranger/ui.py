@@ -1,8 +1,7 @@
 from __future__ import absolute_import
 
-import os
-
 from netranger import Vim
+from netranger.fs import LocalFS
 
 
 class UI(object):
@@ -146,21 +145,32 @@ class SortUI(UI):
         'd': lambda n: '',
         'e': lambda n: SortUI.ext_name(n.name),
         'm': lambda n: n.stat.st_ctime if n.stat is not None else -1,
-        's': lambda n: SortUI.size(n.fullpath),
+        's': lambda n: SortUI.size(n),
     }
 
     sort_fn_ch = 'd'
     reverse = False
 
     @classmethod
-    def size(self, path):
-        try:
-            if os.path.isdir(path):
-                return str(len(os.listdir(path))).rjust(18)
-            else:
-                return str(os.stat(path).st_size).rjust(18)
-        except PermissionError:
+    def size(self, node):
+        """ Return the size of the node. The size of a directory is its number
+        of entries, taken from the cache shared with the size column. Unknown
+        sizes are -1 and sort first. """
+        if node.stat is None:
             return -1
+        if node.is_DIR:
+            count = LocalFS.child_counts.get(node.fullpath,
+                                             node.stat.st_mtime_ns)
+            if count is None and node.buf is not None:
+                # Counted at once in synchronous mode. Otherwise, the buffer
+                # is sorted again when the count arrives.
+                node.buf.request_child_count(node)
+                count = LocalFS.child_counts.get(node.fullpath,
+                                                 node.stat.st_mtime_ns)
+            if not isinstance(count, int):
+                return -1
+            return count
+        return node.stat.st_size
 
     @classmethod
     def ext_name(self, path):
@@ -7,3 +7,12 @@ def GenNetRangerScriptCmd(script):
     path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                         f'../{script}.py')
     return f'{python} {path}'
+
+
+def is_ascii(s):
+    """ Same as str.isascii, which is not available before python 3.7. """
+    try:
+        s.encode('ascii')
+    except UnicodeEncodeError:
+        return False
+    return True
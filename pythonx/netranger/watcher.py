@@ -0,0 +1,143 @@
+from __future__ import absolute_import
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+from collections import defaultdict
+
+
+class InotifyWatcher(object):
+    """ Watch directories for created, deleted and moved entries with the
+    linux inotify api (through ctypes).
+
+    Each watched directory is owned by one or more owners (NetRangerBuf). The
+    inotify file descriptor is non-blocking and is drained by read_events in
+    the vim thread, e.g. from a repeating timer.
+    """
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+                  | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    EVENT = struct.Struct('iIII')
+    READ_SIZE = 65536
+
+    @classmethod
+    def create(cls):
+        """ Return a watcher or None if inotify is not available. """
+        try:
+            return cls()
+        except (OSError, AttributeError):
+            return None
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on linux')
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                           use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                    ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._wd2path = {}
+        self._path2wd = {}
+        self._owners = defaultdict(set)
+
+    def watch(self, path, owner):
+        """ Watch directory path for owner. Return False if it can not be
+        watched (e.g. the user limit of watches is reached). """
+        if path not in self._path2wd:
+            wd = self._add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+            if wd < 0:
+                return False
+            self._wd2path[wd] = path
+            self._path2wd[path] = wd
+        self._owners[path].add(owner)
+        return True
+
+    def unwatch(self, path, owner):
+        """ Stop watching path for owner. The watch is removed when it has no
+        owner. """
+        owners = self._owners.get(path)
+        if owners is None:
+            return
+        owners.discard(owner)
+        if not owners:
+            del self._owners[path]
+            wd = self._path2wd.pop(path, None)
+            if wd is not None:
+                del self._wd2path[wd]
+                self._rm_watch(self.fd, wd)
+
+    def unwatch_all(self, owner):
+        for path in [p for p, o in self._owners.items() if owner in o]:
+            self.unwatch(path, owner)
+
+    def owners(self, path):
+        return list(self._owners.get(path, ()))
+
+    @property
+    def watching(self):
+        """ Return True if some directory is watched. """
+        return bool(self._path2wd)
+
+    def read_events(self):
+        """ Read all pending events. Return (overflow, changes, gone) where
+            overflow: True if the kernel dropped events
+            changes: {dirpath: {name: True if created else False}}, where
+                     consecutive events of the same entry are coalesced
+            gone: the watched directories deleted or moved
+        """
+        overflow = False
+        changes = defaultdict(dict)
+        gone = set()
+        while True:
+            try:
+                buf = os.read(self.fd, self.READ_SIZE)
+            except OSError:
+                # EAGAIN: no more events.
+                break
+            if not buf:
+                break
+
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, name_len = self.EVENT.unpack_from(buf, offset)
+                offset += self.EVENT.size
+                name = os.fsdecode(buf[offset:offset + name_len].rstrip(b'\0'))
+                offset += name_len
+
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                path = self._wd2path.get(wd)
+                if path is None:
+                    continue
+                if mask & self.IN_IGNORED:
+                    # The watch is removed by the kernel (e.g. path deleted).
+                    del self._wd2path[wd]
+                    del self._path2wd[path]
+                    gone.add(path)
+                elif mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                    gone.add(path)
+                elif mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    changes[path][name] = True
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    changes[path][name] = False
+        return overflow, changes, gone
@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+
+from collections import defaultdict
+
+
+class WinIndex(object):
+    """ Index of the windows of all tab pages by the buffer they show and by
+    the name (full path) of that buffer.
+
+    Windows are identified by their window id. The index is kept up to date
+    by the WinNew, BufWinEnter, BufFilePost and WinClosed autocmds (see
+    Netranger.on_winbuf etc.) so that finding the windows of a buffer does
+    not scan every window. Without WinClosed, closed windows are not removed.
+    Users of the index must hence skip ids of windows that no longer exist.
+    """
+    def __init__(self):
+        self._win_buf = {}
+        self._buf_wins = defaultdict(set)
+        self._path_wins = defaultdict(set)
+
+    def reset(self, wins):
+        """ Rebuild the index from wins, a list of (winid, bufnr, path). """
+        self._win_buf = {}
+        self._buf_wins = defaultdict(set)
+        self._path_wins = defaultdict(set)
+        for winid, bufnr, path in wins:
+            self.set(winid, bufnr, path)
+
+    def set(self, winid, bufnr, path):
+        """ Record that window winid shows buffer bufnr named path. """
+        self.remove(winid)
+        self._win_buf[winid] = (bufnr, path)
+        self._buf_wins[bufnr].add(winid)
+        self._path_wins[path].add(winid)
+
+    def remove(self, winid):
+        entry = self._win_buf.pop(winid, None)
+        if entry is None:
+            return
+        bufnr, path = entry
+        self._discard(self._buf_wins, bufnr, winid)
+        self._discard(self._path_wins, path, winid)
+
+    def rename_buf(self, bufnr, path):
+        """ Record that buffer bufnr is now named path. """
+        for winid in self.buf_wins(bufnr):
+            self.set(winid, bufnr, path)
+
+    def buf_wins(self, bufnr):
+        """ Return the ids of the windows showing buffer bufnr. """
+        return sorted(self._buf_wins.get(bufnr, ()))
+
+    def path_wins(self, path, buf_name=None):
+        """ Return the ids of the windows showing a buffer named path. If
+        buf_name is given, it is called with a buffer number to check that
+        the buffer is still named path (it returns None for wiped out
+        buffers). Windows of renamed buffers are then indexed by their new
+        name. """
+        winids = sorted(self._path_wins.get(path, ()))
+        if buf_name is None:
+            return winids
+        res = []
+        for winid in winids:
+            bufnr = self._win_buf[winid][0]
+            name = buf_name(bufnr)
+            if name == path:
+                res.append(winid)
+            elif name is None:
+                self.remove(winid)
+            else:
+                self.set(winid, bufnr, name)
+        return res
+
+    @staticmethod
+    def _discard(index, key, winid):
+        wins = index.get(key)
+        if wins is not None:
+            wins.discard(winid)
+            if not wins:
+                del index[key]
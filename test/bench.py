@@ -0,0 +1,145 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from neovim import attach
+
+from netranger.nodetable import NodeTable
+from tshell import Shell
+
+
+def prepare_bench_dir(dirname, num_files, num_dirs):
+    Shell.mkdir(dirname)
+    # Shell.touch spawns a process per file, which is too slow here.
+    for i in range(num_files):
+        open(os.path.join(dirname, 'file{:07d}.txt'.format(i)), 'w').close()
+    for i in range(num_dirs):
+        Shell.mkdir(os.path.join(dirname, 'dir{:07d}'.format(i)))
+
+
+def bench_open(dirname):
+    """ Open dirname and report the time spent and the python memory
+    allocated per node while building the netranger buffer. """
+    nvim.command('py3 import tracemalloc, time')
+    nvim.command('py3 tracemalloc.start()')
+    nvim.command('py3 _bench_mem = tracemalloc.get_traced_memory()[0]')
+    nvim.command('py3 _bench_time = time.time()')
+    nvim.command('edit {}'.format(dirname))
+    elapsed = nvim.eval('py3eval("time.time() - _bench_time")')
+    mem = nvim.eval(
+        'py3eval("tracemalloc.get_traced_memory()[0] - _bench_mem")')
+    nvim.command('py3 tracemalloc.stop()')
+    num_nodes = nvim.eval('py3eval("len(ranger.cur_buf.nodes)")')
+    nvim.command('bwipeout')
+    return {
+        'nodes': num_nodes,
+        'seconds': elapsed,
+        'bytes/node': mem / num_nodes,
+    }
+
+
+class FakeNode(object):
+    __slots__ = ('name', 'level', 'is_DIR')
+
+    def __init__(self, name, level, is_DIR):
+        self.name = name
+        self.level = level
+        self.is_DIR = is_DIR
+
+
+def fake_tree(num_nodes, fanout=20, max_level=6):
+    """ Return FakeNodes of a random nested tree in depth first order. """
+    nodes = []
+
+    def add(level):
+        for i in range(random.randint(1, fanout)):
+            if len(nodes) >= num_nodes:
+                return
+            is_dir = random.random() < 0.3
+            nodes.append(FakeNode('n{}'.format(len(nodes)), level, is_dir))
+            if is_dir and level < max_level:
+                add(level + 1)
+
+    while len(nodes) < num_nodes:
+        add(0)
+    return nodes
+
+
+def legacy_reverse_sorted_nodes(nodes):
+    """ The reverse ordering netranger used before sibling-group reversal. """
+    rev = []
+    prev_level = -1
+    cur_ind = 0
+    for node in nodes:
+        if node.level <= prev_level:
+            for i, n in enumerate(rev):
+                if n.level == node.level:
+                    rev.insert(i, node)
+                    cur_ind = i + 1
+                    break
+        else:
+            rev.insert(cur_ind, node)
+            cur_ind += 1
+
+        prev_level = node.level
+    return rev
+
+
+def bench_reverse_sort(num_nodes):
+    """ Compare reverse sorting with the legacy ordering on a nested tree.
+    Raise if the orders differ. """
+    nodes = fake_tree(num_nodes)
+
+    def key(n):
+        return (not n.is_DIR, n.name)
+
+    sorted_nodes = NodeTable(nodes).tree_sorted(key)
+    beg = time.time()
+    legacy = legacy_reverse_sorted_nodes(sorted_nodes)
+    legacy_elapsed = time.time() - beg
+
+    beg = time.time()
+    rev = NodeTable(nodes).tree_sorted(key, reverse=True)
+    elapsed = time.time() - beg
+
+    if [id(n) for n in rev] != [id(n) for n in legacy]:
+        raise AssertionError('reverse sort differs from the legacy order')
+    return {
+        'nodes': len(nodes),
+        'legacy seconds': legacy_elapsed,
+        'seconds': elapsed,
+    }
+
+
+def report(name, result):
+    print('{}: {}'.format(
+        name, ', '.join('{}={:.4g}'.format(k, v) for k, v in result.items())))
+
+
+parser = argparse.ArgumentParser(description='')
+parser.add_argument(
+    '--listen_address',
+    default=None,
+    help='NVIM_LISTEN_ADDRESS for an open neovim. If set to none, open a \
+    headless neovim instead.')
+parser.add_argument('--num_files', type=int, default=100000)
+parser.add_argument('--num_dirs', type=int, default=1000)
+parser.add_argument('--num_sort_nodes', type=int, default=20000)
+args = parser.parse_args(sys.argv[1:])
+
+if args.listen_address:
+    nvim = attach('socket', path=args.listen_address)
+else:
+    nvim = attach(
+        'child',
+        argv=['nvim', '-u', './test_init.vim', '--embed', '--headless'])
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as dirname:
+        prepare_bench_dir(dirname, args.num_files, args.num_dirs)
+        report('open', bench_open(dirname))
+    report('reverse sort', bench_reverse_sort(args.num_sort_nodes))
+    nvim.close()
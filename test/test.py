@@ -1,7 +1,11 @@
 import argparse
 import os
+import random
 import re
+import shutil
 import sys
+import tempfile
+import threading
 import time
 import unittest
 
@@ -9,8 +13,12 @@ from neovim import attach
 
 from netranger import default
 from netranger.colortbl import colorname2ind
+from netranger.dircache import DirCache
 from netranger.config import (file_sz_display_wid, test_dir, test_local_dir,
                               test_remote_cache_dir, test_remote_dir)
+from netranger.nodetable import NodeTable
+from netranger.statpool import StatPool
+from netranger.watcher import InotifyWatcher
 from tshell import Shell
 
 
@@ -40,7 +48,7 @@ class NetrangerTest(unittest.TestCase):
 
     def ensure_buf_no_expand(self):
         nvim.input('2G')
-        m2 = re.search(r'\[48;5;[0-9]+mdir.*', nvim.call('getline', 2))
+        m2 = re.search(r'\[38;5;[0-9]+mdir.*', nvim.call('getline', 2))
         assert m2, "Assumes line2 is dir"
 
         m3 = re.search(r'\[38;5;[0-9]+mdir2.*', nvim.call('getline', 3))
@@ -53,18 +61,21 @@ class NetrangerTest(unittest.TestCase):
 
     class LineComponent(object):
         def __init__(self, line):
-            m = re.search(r'\[([34])8;5;([0-9]+)?m( *)([^ ]+)([ ]*)([^]*)',
+            m = re.search(r'\[38;5;([0-9]+)?m( *)([^ ]+)([ ]*)([^]*)',
                           line)
-            self.is_foreground = True
-            if m.group(1) == '3':
-                self.is_foreground = False
-            elif m.group(1) != '4':
-                assert False, f"Bg/Fg should use 3/4. Got {m.group(1)}"
-            self.hi = m.group(2)
-            self.level = len(m.group(3)) // len('  ')
-            self.file_name = m.group(4)
-            self.size_str = m.group(6)
-            self.visible_text = f'{self.file_name}{m.group(5)}{self.size_str}'
+            self.hi = m.group(1)
+            self.level = len(m.group(2)) // len('  ')
+            self.file_name = m.group(3)
+            self.size_str = m.group(5)
+            self.visible_text = f'{self.file_name}{m.group(4)}{self.size_str}'
+
+    def cursor_hi_ind(self):
+        # The cursor line is highlighted by a match of the window (see
+        # NetRangerBuf.redraw_cursor) instead of by the line content.
+        for m in nvim.call('getmatches'):
+            if m['group'].endswith('Sel'):
+                return m['pos1'][0] - 1
+        return None
 
     def wait_for_fs_free(self):
         while nvim.command_output(
@@ -161,15 +172,13 @@ class NetrangerTest(unittest.TestCase):
 
         cLineNo = nvim.call('line', '.') - 1
         if ind is None or ind == cLineNo:
-            self.assertTrue(
-                lc.is_foreground,
-                f'Background highlight mismatch. ind: {ind}, curLine: {cLineNo}'
-            )
+            self.assertEqual(
+                cLineNo, self.cursor_hi_ind(),
+                f'Cursor highlight mismatch. ind: {ind}, curLine: {cLineNo}')
         else:
-            self.assertFalse(
-                lc.is_foreground,
-                f'Background highlight mismatch. ind: {ind}, curLine: {cLineNo}'
-            )
+            self.assertNotEqual(
+                ind, self.cursor_hi_ind(),
+                f'Cursor highlight mismatch. ind: {ind}, curLine: {cLineNo}')
 
     def assert_num_content_line(self, numLine):
         self.assertEqual(numLine, len(nvim.current.buffer) - 2)
@@ -451,12 +460,213 @@ class TestBuilitInFunctions(NetrangerLocalTest):
         self.assert_content('dir2', ind=6, hi='dir', level=0)
         nvim.input('Sd')
 
+    def test_incremental_update_sorted(self):
+        """ Nodes inserted/removed incrementally (see
+        NetRangerBuf._apply_node_changes) are ordered as by sort_nodes. """
+        rng = random.Random(0)
+        root = os.path.abspath('rand')
+        dirs = [root]
+        files = []
+
+        def new_name():
+            return 'n{:03d}{}'.format(rng.randrange(1000),
+                                      rng.choice(['', '.a', '.b']))
+
+        def create(count):
+            for _ in range(count):
+                path = os.path.join(rng.choice(dirs), new_name())
+                if os.path.exists(path):
+                    continue
+                if rng.random() < 0.3:
+                    Shell.mkdir(path)
+                    dirs.append(path)
+                else:
+                    open(path, 'w').close()
+                    files.append(path)
+
+        def is_under(path, dirpath):
+            return path == dirpath or path.startswith(dirpath + '/')
+
+        def remove(count):
+            for _ in range(count):
+                if rng.random() < 0.1 and len(dirs) > 1:
+                    path = rng.choice(dirs[1:])
+                    Shell.rm(path)
+                    dirs[:] = [d for d in dirs if not is_under(d, path)]
+                    files[:] = [f for f in files if not is_under(f, path)]
+                elif files:
+                    path = rng.choice(files)
+                    Shell.rm(path)
+                    files.remove(path)
+
+        Shell.mkdir(root)
+        create(60)
+        nvim.command('edit .')
+        nvim.command('py3 ranger.cur_buf.set_clineno_by_node('
+                     'ranger.cur_buf.nodes[ranger.cur_buf.node_table'
+                     f'.path_index("{root}")])')
+        nvim.input('zA')
+
+        nodes = '[n.fullpath for n in ranger.cur_buf.non_info_nodes]'
+        sorted_nodes = ('[n.fullpath for n in ranger.cur_buf.sort_nodes('
+                        'ranger.cur_buf.non_info_nodes)]')
+        for sort_key in ['d', 'D']:
+            nvim.input('S' + sort_key)
+            for _ in range(20):
+                remove(rng.randrange(4))
+                create(rng.randrange(8))
+                nvim.command('py3 ranger.cur_buf.content_outdated = True')
+                nvim.command('py3 ranger.cur_buf.update_nodes_and_redraw()')
+                actual = nvim.eval(f'py3eval("{nodes}")')
+                self.assertEqual(nvim.eval(f'py3eval("{sorted_nodes}")'),
+                                 actual)
+                self.assertEqual(len(actual) + 2, len(nvim.current.buffer))
+        nvim.input('Sd')
+
+    def test_stream_listing(self):
+        # Streaming requires async timers. Instead, the chunks are appended
+        # by calling on_stream_listing directly.
+        names = [f'f{i:03}' for i in range(100)]
+        Shell.mkdir('stream')
+        for name in names:
+            Shell.touch(f'stream/{name}')
+        patched = ('(netranger.Vim.has_async_timer, '
+                   'netranger.netranger.stream_listing_chunk_size, '
+                   'netranger.netranger.NetRangerBuf.'
+                   '_schedule_stream_listing)')
+        nvim.command(f'py3 _NETRTestOri = {patched}')
+        nvim.command(f'py3 {patched} = (True, 20, lambda self: None)')
+        self.addCleanup(nvim.command, f'py3 {patched} = _NETRTestOri')
+        nvim.vars['NETRStreamListing'] = True
+        self.addCleanup(nvim.command, 'unlet g:NETRStreamListing')
+
+        busy = 'py3eval("ranger.cur_buf.fs_busy(False)")'
+        nvim.command(f'silent tabe {test_local_dir}/stream')
+        num_lines = len(nvim.current.buffer)
+        self.assertLess(num_lines, len(names) + 2)
+        self.assertTrue(nvim.eval(busy))
+        nvim.input('3G')
+        cur_name = self.clineinfo.file_name
+
+        while nvim.eval(busy):
+            nvim.command('py3 ranger.cur_buf.on_stream_listing()')
+            self.assertLessEqual(num_lines, len(nvim.current.buffer))
+            num_lines = len(nvim.current.buffer)
+            self.assertEqual(cur_name, self.clineinfo.file_name)
+
+        self.assertEqual(len(names) + 2, num_lines)
+        self.assertEqual(names, [
+            NetrangerTest.LineComponent(line).file_name
+            for line in nvim.current.buffer[1:-1]
+        ])
+        self.assertEqual(cur_name, self.clineinfo.file_name)
+
+    def test_search_stop_cursor_hi(self):
+        for keys in ['<esc>', 'dir2<cr>']:
+            nvim.input('/')
+            # The prompt is opened by a timer.
+            time.sleep(0.1)
+            nvim.input(keys)
+            time.sleep(0.1)
+            self.assertEqual('netranger', nvim.eval('&ft'))
+            self.assertEqual(1, len(nvim.call('getmatches')))
+            self.assertEqual(nvim.call('line', '.') - 1, self.cursor_hi_ind())
+        self.assert_content('dir2')
+
 
 class TestDisplay(NetrangerLocalTest):
     def test_fit_winwidth_display(self):
         self.assertEqual(nvim.current.window.width,
                          len(self.clineinfo.visible_text))
 
+    def test_fit_winwidth_gutter_display(self):
+        ori = self.set_vim_window_option('number', True)
+        try:
+            nvim.input('r')
+            self.assertEqual(self.editable_win_width(),
+                             len(self.clineinfo.visible_text))
+        finally:
+            self.set_vim_window_option('number', ori)
+        nvim.input('r')
+        self.assertEqual(nvim.current.window.width,
+                         len(self.clineinfo.visible_text))
+
+    def test_fit_winwidth_signcolumn_auto(self):
+        # The sign column appears with the first sign without any OptionSet.
+        ori = self.set_vim_window_option('signcolumn', 'auto')
+        bufnr = nvim.current.buffer.number
+        nvim.command('sign define NETRTestSign text=>>')
+        try:
+            nvim.input('r')
+            self.assertEqual(nvim.current.window.width,
+                             len(self.clineinfo.visible_text))
+            nvim.command(
+                f'sign place 1 line=1 name=NETRTestSign buffer={bufnr}')
+            nvim.input('r')
+            self.assertEqual(self.editable_win_width(),
+                             len(self.clineinfo.visible_text))
+        finally:
+            nvim.command(f'sign unplace 1 buffer={bufnr}')
+            nvim.command('sign undefine NETRTestSign')
+            self.set_vim_window_option('signcolumn', ori)
+
+    def test_strwidth(self):
+        def assert_strwidth(names):
+            for name in names:
+                self.assertEqual(
+                    nvim.strwidth(name),
+                    nvim.call('py3eval', f'strwidth.strwidth({name!r})'),
+                    repr(name))
+
+        def assert_strwidth_sweep(names):
+            nvim.vars['_netr_test_names'] = names
+            expected = nvim.eval(
+                'map(copy(g:_netr_test_names), "strwidth(v:val)")')
+            actual = nvim.eval('py3eval("[strwidth.strwidth(n) for n in '
+                               'vim.vars[\'_netr_test_names\']]")')
+            nvim.command('unlet g:_netr_test_names')
+            mismatch = [(hex(ord(n[-1])), e, a)
+                        for n, e, a in zip(names, expected, actual) if e != a]
+            self.assertEqual([], mismatch)
+
+        nvim.command('py3 from netranger import strwidth')
+        names = [
+            'a.txt', '測試', '測試a', 'ｆｕｌｌ', '한국어', 'cafe\u0301',
+            '\u0301a', 'Æ±', '😀x', 'a\tb'
+        ]
+        # Latin to CJK symbols (incl. combining marks, box drawing, dingbats)
+        # and the emoji planes, each alone and after a base character.
+        chars = [
+            chr(c) for r in (range(0xa1, 0x3400), range(0x1f000, 0x1fb00))
+            for c in r
+        ]
+        sweep = chars + ['a' + c for c in chars]
+        assert_strwidth(names)
+        assert_strwidth_sweep(sweep)
+        ori = self.set_vim_option('ambiwidth', 'double')
+        try:
+            assert_strwidth(names)
+            assert_strwidth_sweep(sweep)
+        finally:
+            self.set_vim_option('ambiwidth', ori)
+
+    def test_footer_stat_ttl(self):
+        ori = nvim.vars['NETRFooterStatTTL']
+        mtime = 365 * 86400
+        expected = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime))
+        try:
+            nvim.vars['NETRFooterStatTTL'] = 3600 * 1000
+            nvim.input('jk')
+            os.utime('dir', (mtime, mtime))
+            nvim.input('jk')
+            self.assertNotIn(expected, nvim.eval('getline("$")'))
+
+            nvim.vars['NETRFooterStatTTL'] = 0
+            nvim.input('jk')
+            self.assertIn(expected, nvim.eval('getline("$")'))
+        finally:
+            nvim.vars['NETRFooterStatTTL'] = ori
+
     def test_size_display(self):
         Shell.run('echo {} > {}'.format('a' * 1035, 'a'))
         Shell.run('echo {} > {}'.format('b' * 1024, 'b'))
@@ -503,6 +713,41 @@ class TestDisplay(NetrangerLocalTest):
         doit('測試a', -1)
         doit('測試a', -2)
 
+    def test_extmark_backend(self):
+        def assert_extmarks(names):
+            lines = nvim.current.buffer[:]
+            self.assertFalse([l for l in lines if '\x1b' in l])
+            self.assertEqual(names, [l.split()[0] for l in lines[1:-1]])
+            groups = {}
+            for _, row, _, details in nvim.api.buf_get_extmarks(
+                    0, ns, 0, -1, {'details': True}):
+                groups.setdefault(row, set()).add(details['hl_group'])
+            self.assertEqual(set(range(len(lines))), set(groups))
+            for row, name in enumerate(names, 1):
+                self.assertEqual({dir_group if name.startswith('sub')
+                                  else file_group}, groups[row], name)
+
+        nvim.command('py3 from netranger import default, highlight')
+        nvim.command('py3 highlight.init("extmark")')
+        self.addCleanup(nvim.command, 'py3 highlight.init("ansi")')
+        ns = nvim.api.create_namespace('netranger')
+        dir_group, file_group = nvim.eval(
+            'py3eval("[highlight._color_group(default.color[n]) '
+            'for n in (\'dir\', \'file\')]")')
+
+        nvim.command(f'silent tabe {test_local_dir}/dir')
+        assert_extmarks(['subdir', 'subdir2', 'a'])
+
+        # Lines inserted and deleted by the BufWriter.
+        Shell.touch('dir/b')
+        nvim.command('py3 ranger.cur_buf.content_outdated = True')
+        nvim.command('py3 ranger.cur_buf.update_nodes_and_redraw()')
+        assert_extmarks(['subdir', 'subdir2', 'a', 'b'])
+        Shell.rm('dir/subdir')
+        nvim.command('py3 ranger.cur_buf.content_outdated = True')
+        nvim.command('py3 ranger.cur_buf.update_nodes_and_redraw()')
+        assert_extmarks(['subdir2', 'a', 'b'])
+
 
 class TestApi(NetrangerLocalTest):
     def test_api_cur_node_name(self):
@@ -512,6 +757,25 @@ class TestApi(NetrangerLocalTest):
         self.assertEqual(os.path.abspath('dir'),
                          nvim.call('netranger#api#cur_node_path'))
 
+    def test_api_node_stat(self):
+        nvim.command('py3 from netranger.api import NETRApi')
+        st = os.stat('dir')
+        for field in ['st_mode', 'st_size', 'st_mtime_ns', 'st_ino',
+                      'st_nlink', 'st_dev']:
+            self.assertEqual(
+                getattr(st, field),
+                nvim.eval(f'py3eval("NETRApi.cur_node().stat.{field}")'),
+                field)
+
+    def test_api_node_index(self):
+        nvim.command('py3 from netranger.api import NETRApi')
+        node_index = 'py3eval("NETRApi.node_index(NETRApi.cur_node())")'
+        nvim.input('zaj')
+        self.assertEqual(nvim.call('line', '.') - 1, nvim.eval(node_index))
+        nvim.input('kza')
+        nvim.input('j')
+        self.assertEqual(nvim.call('line', '.') - 1, nvim.eval(node_index))
+
     def test_api_cp(self):
         nvim.input('za')
         nvim.call('netranger#api#cp', 'dir/subdir', './')
@@ -540,6 +804,84 @@ class TestApi(NetrangerLocalTest):
         self.assert_content('dir2', ind=2, hi='dir')
         self.assert_fs('dir', ['subdir2'])
 
+    def test_api_render(self):
+        def plain_line(ind):
+            return re.sub('\x1b\\[[0-9;]*m', '', nvim.current.buffer[ind + 1])
+
+        nvim.command('py3 render_mark = "+"')
+        nvim.command('py3 def node_highlight_content_l(node): '
+                     'return render_mark, 15')
+        nvim.command('py3 NETRApi.RegisterHooker(node_highlight_content_l)')
+        try:
+            nvim.call('netranger#api#render')
+            self.assertTrue(plain_line(1).startswith('+dir2'))
+            # The rendered lines are cached until render is called.
+            nvim.command('py3 render_mark = "*"')
+            nvim.input('jk')
+            self.assertTrue(plain_line(1).startswith('+dir2'))
+            nvim.call('netranger#api#render')
+            self.assertTrue(plain_line(1).startswith('*dir2'))
+        finally:
+            nvim.command(
+                'py3 NETRApi.Hookers["node_highlight_content_l"].clear()')
+            nvim.call('netranger#api#render')
+
+    def test_api_batch_hooker(self):
+        def plain_line(ind):
+            return re.sub('\x1b\\[[0-9;]*m', '', nvim.current.buffer[ind + 1])
+
+        nvim.command('py3 batch_calls = []')
+        nvim.command('py3 def node_highlight_content_r(nodes): '
+                     'return batch_calls.append(len(nodes)) or '
+                     '[("#" + n.name, 15) for n in nodes]')
+        nvim.command(
+            'py3 NETRApi.RegisterBatchHooker(node_highlight_content_r)')
+        try:
+            nvim.call('netranger#api#render')
+            self.assertTrue(plain_line(0).endswith('#dir'))
+            self.assertTrue(plain_line(1).endswith('#dir2'))
+            # A single call for all nodes.
+            self.assertEqual([2], nvim.eval('py3eval("batch_calls")'))
+            # Segments are cached across redraws.
+            nvim.input('jkr')
+            self.assertEqual([2], nvim.eval('py3eval("batch_calls")'))
+        finally:
+            nvim.command(
+                'py3 NETRApi.Hookers["node_highlight_content_r"].clear()')
+            nvim.command('py3 NETRApi.BatchHookers.clear()')
+            nvim.call('netranger#api#render')
+
+    def test_api_batch_hooker_mtime_key(self):
+        def cached(name):
+            return nvim.eval(
+                'py3eval("[p for p in NETRApi.BatchHookers[0]._cache '
+                f'if p.endswith(\'/{name}\')]")')
+
+        Shell.run('ln -s nonexist broken')
+        nvim.command('py3 def node_highlight_content_r(nodes): '
+                     'return [("#" + n.name, 15) for n in nodes]')
+        nvim.command('py3 NETRApi.RegisterBatchHooker('
+                     'node_highlight_content_r, key=NETRApi.mtime_key)')
+        try:
+            # A broken link has no mtime.
+            nvim.command('edit .')
+            self.assertTrue(
+                any(
+                    re.sub('\x1b\\[[0-9;]*m', '', line).endswith('#broken')
+                    for line in nvim.current.buffer))
+            self.assertNotEqual([], cached('broken'))
+
+            # Segments of removed nodes are dropped.
+            nvim.input('za')
+            self.assertNotEqual([], cached('subdir'))
+            nvim.input('za')
+            self.assertEqual([], cached('subdir'))
+        finally:
+            nvim.command(
+                'py3 NETRApi.Hookers["node_highlight_content_r"].clear()')
+            nvim.command('py3 NETRApi.BatchHookers.clear()')
+            nvim.call('netranger#api#render')
+
 
 class TestApiRemote(NetrangerRemoteTest):
     def test_api_cp_remote(self):
@@ -620,6 +962,20 @@ class TestAutoCmd(NetrangerLocalTest):
         nvim.command('quit')
         self.assert_num_content_line(6)
 
+    def test_on_bufenter_fs_change_keeps_sort_order(self):
+        nvim.input('za')
+        nvim.command('split new')
+        Shell.touch('dir/0')
+        Shell.mkdir('dir1')
+        nvim.command('quit')
+        self.assert_content('dir', ind=0, hi='dir')
+        self.assert_content('subdir2', ind=2, level=1, hi='dir')
+        self.assert_content('0', ind=3, level=1, hi='file')
+        self.assert_content('a', ind=4, level=1, hi='file')
+        self.assert_content('dir1', ind=5, hi='dir')
+        self.assert_content('dir2', ind=6, hi='dir')
+        self.assert_num_content_line(7)
+
     def test_on_bufenter_cursor_stay_the_same_pos(self):
         nvim.input('ljhl')
         self.assert_content('subdir', ind=0, hi='dir')
@@ -644,6 +1000,86 @@ class TestAutoCmd(NetrangerLocalTest):
         nvim.command('wincmd w')
         self.assertEqual(right_panel_line_no, nvim.call('line', '.'))
 
+    def enable_watcher(self):
+        """ The watcher is disabled without async timers (see _NETRDebug),
+        so it is created here and polled by calling on_fs_events. """
+        nvim.command('py3 from netranger.watcher import InotifyWatcher')
+        nvim.command('py3 ranger.watcher = InotifyWatcher.create()')
+        if nvim.eval('py3eval("ranger.watcher is None")'):
+            self.skipTest('inotify is not available')
+        self.addCleanup(nvim.command, 'py3 ranger.watcher = None')
+        self.addCleanup(nvim.command,
+                        'py3 import os; os.close(ranger.watcher.fd)')
+
+    def test_bufwipeout(self):
+        self.enable_watcher()
+        nvim.command(f'tabe {test_local_dir}/dir')
+        bufnum = nvim.current.buffer.number
+        watched = ('py3eval("bool(ranger.watcher.owners('
+                   f'\'{test_local_dir}/dir\'))")')
+        self.assertTrue(nvim.eval(watched))
+        nvim.command('bwipeout')
+        self.assertFalse(nvim.eval(f'py3eval("{bufnum} in ranger._bufs")'))
+        self.assertFalse(nvim.eval(watched))
+
+    def test_apply_fs_events(self):
+        self.enable_watcher()
+        nvim.command('py3 ranger.cur_buf._watch(ranger.cur_buf.wd)')
+        # Expanding dir watches it as well.
+        nvim.input('za')
+        Shell.touch('dir/b')
+        Shell.rm('dir2')
+        Shell.mkdir('dir3')
+        nvim.command('py3 ranger.on_fs_events()')
+        self.assertEqual(8, len(nvim.current.buffer))
+        self.assert_content('dir', ind=0, level=0, hi='dir')
+        self.assert_content('a', ind=3, level=1, hi='file')
+        self.assert_content('b', ind=4, level=1, hi='file')
+        self.assert_content('dir3', ind=5, level=0, hi='dir')
+
+    def test_debounce_timer(self):
+        nvim.vars['_NETRTestCount'] = 0
+        cmd = 'let g:_NETRTestCount += 1'
+        timer_id = -1
+        for _ in range(5):
+            timer_id = nvim.call('netranger#async#restart_timer', timer_id,
+                                 100, cmd)
+        time.sleep(0.5)
+        self.assertEqual(nvim.vars['_NETRTestCount'], 1)
+
+    def test_win_index(self):
+        def assert_win_index(bufnr):
+            self.assertEqual(
+                sorted(nvim.call('win_findbuf', bufnr)),
+                nvim.eval(f'py3eval("ranger.win_index.buf_wins({bufnr})")'))
+
+        bufnr = nvim.current.buffer.number
+        nvim.command('vsplit')
+        assert_win_index(bufnr)
+        nvim.command('tabnew')
+        nvim.command(f'{bufnr}b')
+        assert_win_index(bufnr)
+        nvim.command('edit new')
+        assert_win_index(bufnr)
+        nvim.command('tabclose')
+        nvim.command('quit')
+        assert_win_index(bufnr)
+
+    def test_win_index_rename(self):
+        def path_wins(path):
+            return nvim.eval('py3eval("ranger.win_index.path_wins('
+                             f'\'{path}\', ranger._buf_name)")')
+
+        nvim.command('tabnew')
+        nvim.command('file old_name')
+        winid = nvim.call('win_getid')
+        old_name = nvim.current.buffer.name
+        self.assertEqual([winid], path_wins(old_name))
+        nvim.command('file new_name')
+        self.assertEqual([], path_wins(old_name))
+        self.assertEqual([winid], path_wins(nvim.current.buffer.name))
+        nvim.command('tabclose!')
+
 
 class TestSetOption(NetrangerLocalTest):
     def test_opt_Autochdir(self):
@@ -663,6 +1099,18 @@ class TestSetOption(NetrangerLocalTest):
 
         nvim.vars['NETRAutochdir'] = default_value
 
+    def test_opt_HeaderFooterBar(self):
+        default_value = nvim.vars['NETRHeaderFooterBar']
+        nvim.vars['NETRHeaderFooterBar'] = True
+        nvim.command(f'tabe {test_local_dir}/dir')
+        nvim.input('j')
+        self.assertIn('_NETRFooter', nvim.eval('&l:statusline'))
+        footer = nvim.eval('get(b:, "_NETRFooter", "")')
+        self.assertNotEqual(footer, '')
+        self.assertNotIn(footer, nvim.eval('getline("$")'))
+        nvim.command('quit')
+        nvim.vars['NETRHeaderFooterBar'] = default_value
+
     def test_NETRToggleExpandRec(self):
         # Set foldnestmax=1 should behave exactly the same as NETRToggleExpand
         fdn = self.set_vim_window_option('foldnestmax', 1)
@@ -818,6 +1266,262 @@ class TestBuilitInFunctionsRemote(NetrangerRemoteTest):
         self.assert_content('zf', ind=2, hi='file', level=0)
 
 
+class TestNodeTable(unittest.TestCase):
+    class Node(object):
+        def __init__(self, name):
+            self.name = name
+            self.level = 0
+
+    def test_filter_by_name(self):
+        nodes = [
+            self.Node(name)
+            for name in ['foo', 'afoo', 'foo.txt', 'barfoo', 'xfoo', 'bar']
+        ]
+        table = NodeTable(nodes)
+        patterns = [
+            'foo', 'o.t', '\\Afoo', '^foo', 'foo$', 'foo\\Z', '(?<=a)foo',
+            '(?<!a)foo', '[^f]oo'
+        ]
+        for pattern in patterns:
+            self.assertEqual(
+                [n.name for n in nodes if re.match('.*' + pattern, n.name)],
+                [n.name for n in table.filter_by_name(pattern)], pattern)
+
+
+class TestStatPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = StatPool(1)
+        self.ran = []
+        self.done = []
+        # Keep the only worker busy so that the following jobs stay queued.
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.pool.submit('block', self.block, (), self.on_done)
+        self.assertTrue(self.started.wait(5))
+
+    def block(self):
+        self.ran.append('block')
+        self.started.set()
+        self.release.wait(5)
+
+    def job(self, key):
+        self.ran.append(key)
+        return key.upper()
+
+    def on_done(self, pairs):
+        self.done.append(pairs)
+
+    def drain_all(self):
+        self.release.set()
+        # Wait for all the jobs to finish without draining them so that the
+        # results are reported by a single drain.
+        for _ in range(500):
+            with self.pool._cv:
+                if not self.pool._latest and not self.pool._num_running:
+                    break
+            time.sleep(0.01)
+        self.pool.drain()
+        self.assertFalse(self.pool.busy)
+
+    def test_sync(self):
+        pool = StatPool(0)
+        self.assertFalse(pool.is_async)
+        pool.submit('a', self.job, ('a', ), self.on_done)
+        self.assertEqual([[('a', 'A')]], self.done)
+        self.release.set()
+
+    def test_priority_supersede(self):
+        self.pool.submit('a', self.job, ('a', ), self.on_done)
+        self.pool.submit('b', self.job, ('b', ), self.on_done)
+        self.pool.submit('b', self.job, ('b', ), self.on_done, priority=0)
+        self.drain_all()
+        self.assertEqual(['block', 'b', 'a'], self.ran)
+
+    def test_dedupe(self):
+        self.pool.submit('a', self.job, ('a', ), self.on_done, priority=0)
+        self.pool.submit('a', self.job, ('a', ), self.on_done)
+        self.pool.submit('a', self.job, ('a', ), self.on_done, priority=0)
+        self.drain_all()
+        self.assertEqual(['block', 'a'], self.ran)
+
+    def test_drain_grouping(self):
+        other_done = []
+        self.pool.submit('a', self.job, ('a', ), self.on_done)
+        self.pool.submit('b', self.job, ('b', ), other_done.append)
+        self.pool.submit('c', self.job, ('c', ), self.on_done)
+        self.drain_all()
+        self.assertEqual([[('block', None), ('a', 'A'), ('c', 'C')]],
+                         self.done)
+        self.assertEqual([[('b', 'B')]], other_done)
+
+    def test_worker_exception(self):
+        def fail():
+            raise OSError('fail')
+
+        self.pool.submit('a', fail, (), self.on_done)
+        self.pool.submit('b', self.job, ('b', ), self.on_done)
+        self.drain_all()
+        results = dict(self.done[0])
+        self.assertIsInstance(results['a'], OSError)
+        self.assertEqual('B', results['b'])
+
+
+class TestDirCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.wd = os.path.join(self.tmp_dir, 'wd')
+        os.makedirs(os.path.join(self.wd, 'subdir'))
+        with open(os.path.join(self.wd, 'a'), 'w') as f:
+            f.write('a')
+        os.symlink('a', os.path.join(self.wd, 'link'))
+        self.cache = DirCache(os.path.join(self.tmp_dir, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def cache_file_stat(self, dirname):
+        st = os.stat(self.cache.cache_path(dirname))
+        return st.st_ino, st.st_mtime_ns
+
+    def test_round_trip(self):
+        records = self.cache.refresh(self.wd)
+        entries = {e.name: e for e in self.cache.load(self.wd)}
+        self.assertEqual(sorted(['a', 'subdir', 'link']), sorted(entries))
+        self.assertTrue(entries['subdir'].is_dir())
+        self.assertFalse(entries['a'].is_dir())
+        self.assertTrue(entries['link'].is_symlink())
+        self.assertEqual('a', entries['link'].linkto)
+        self.assertEqual(os.path.join(self.wd, 'a'), entries['a'].path)
+        st = os.stat(os.path.join(self.wd, 'a'))
+        cached_st = entries['a'].stat()
+        self.assertEqual(st.st_size, cached_st.st_size)
+        self.assertEqual(st.st_mode, cached_st.st_mode)
+        self.assertEqual(st.st_mtime_ns, cached_st.st_mtime_ns)
+        self.assertEqual(records, [e.record for e in entries.values()])
+
+    def test_stale(self):
+        self.assertIsNone(self.cache.load(self.wd))
+        self.cache.refresh(self.wd)
+        dir_st = os.stat(self.wd)
+
+        # Another directory with the same path and mtime.
+        os.rename(self.wd, self.wd + '.bak')
+        os.mkdir(self.wd)
+        os.utime(self.wd, ns=(dir_st.st_atime_ns, dir_st.st_mtime_ns))
+        self.assertIsNone(self.cache.load(self.wd))
+        os.rmdir(self.wd)
+        os.rename(self.wd + '.bak', self.wd)
+        self.assertIsNotNone(self.cache.load(self.wd))
+
+        os.utime(self.wd, ns=(dir_st.st_atime_ns, dir_st.st_mtime_ns + 1))
+        self.assertIsNone(self.cache.load(self.wd))
+
+    def test_revalidate(self):
+        self.cache.refresh(self.wd)
+        ori = self.cache_file_stat(self.wd)
+        self.cache.refresh(self.wd)
+        self.assertEqual(ori, self.cache_file_stat(self.wd))
+
+        # Reading a file only changes its atime.
+        record = self.cache.load(self.wd)[0].record
+        read_record = record[:7] + (record[7] + 1, ) + record[8:]
+        self.assertTrue(DirCache.same_record(record, read_record))
+        self.assertFalse(
+            DirCache.same_record(record, record[:6] + (record[6] + 1, ) +
+                                 record[7:]))
+
+        # Modifying a file does not change the mtime of the directory.
+        path = os.path.join(self.wd, 'a')
+        with open(path, 'a') as f:
+            f.write('a')
+        self.cache.refresh(self.wd)
+        self.assertNotEqual(ori, self.cache_file_stat(self.wd))
+        entries = {e.name: e for e in self.cache.load(self.wd)}
+        self.assertEqual(2, entries['a'].stat().st_size)
+
+    def test_evict(self):
+        self.cache.max_files = 2
+        dirs = [os.path.join(self.wd, 'subdir', str(i)) for i in range(3)]
+        for i, d in enumerate(dirs[:2]):
+            os.mkdir(d)
+            self.cache.refresh(d)
+            os.utime(self.cache.cache_path(d), ns=(i, i))
+        # Loading dirs[0] makes it the most recently used.
+        self.assertIsNotNone(self.cache.load(dirs[0]))
+        os.mkdir(dirs[2])
+        self.cache.refresh(dirs[2])
+        self.assertEqual(2, len(os.listdir(self.cache.cache_dir)))
+        self.assertIsNotNone(self.cache.load(dirs[0]))
+        self.assertIsNone(self.cache.load(dirs[1]))
+        self.assertIsNotNone(self.cache.load(dirs[2]))
+
+
+class TestInotifyWatcher(unittest.TestCase):
+    def setUp(self):
+        self.watcher = InotifyWatcher.create()
+        if self.watcher is None:
+            self.skipTest('inotify is not available')
+        self.addCleanup(os.close, self.watcher.fd)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, 'old')
+        with open(self.path, 'w'):
+            pass
+        self.assertTrue(self.watcher.watch(self.tmp_dir, 'owner'))
+
+    def touch(self, name):
+        with open(os.path.join(self.tmp_dir, name), 'w'):
+            pass
+
+    def test_coalesce(self):
+        self.touch('a')
+        os.remove(os.path.join(self.tmp_dir, 'a'))
+        os.remove(self.path)
+        self.touch('old')
+        self.touch('b')
+        os.rename(os.path.join(self.tmp_dir, 'b'),
+                  os.path.join(self.tmp_dir, 'c'))
+        overflow, changes, gone = self.watcher.read_events()
+        self.assertFalse(overflow)
+        self.assertEqual(set(), gone)
+        self.assertEqual(
+            {self.tmp_dir: {
+                'a': False,
+                'old': True,
+                'b': False,
+                'c': True
+            }}, changes)
+        self.assertEqual((False, {}, set()), self.watcher.read_events())
+
+    def test_gone(self):
+        subdir = os.path.join(self.tmp_dir, 'subdir')
+        os.mkdir(subdir)
+        self.assertTrue(self.watcher.watch(subdir, 'owner'))
+        self.watcher.read_events()
+        os.rmdir(subdir)
+        _, changes, gone = self.watcher.read_events()
+        self.assertEqual({subdir}, gone)
+        self.assertEqual({self.tmp_dir: {'subdir': False}}, changes)
+        # The kernel removes the watch of a deleted directory (IN_IGNORED).
+        self.watcher.unwatch(self.tmp_dir, 'owner')
+        self.assertFalse(self.watcher.watching)
+        self.watcher.unwatch(subdir, 'owner')
+        self.assertEqual([], self.watcher.owners(subdir))
+
+    def test_unwatch(self):
+        self.assertTrue(self.watcher.watch(self.tmp_dir, 'other'))
+        self.assertEqual({'owner', 'other'},
+                         set(self.watcher.owners(self.tmp_dir)))
+        self.watcher.unwatch(self.tmp_dir, 'owner')
+        self.assertEqual(['other'], self.watcher.owners(self.tmp_dir))
+        self.assertTrue(self.watcher.watching)
+        self.watcher.unwatch_all('other')
+        self.assertEqual([], self.watcher.owners(self.tmp_dir))
+        self.assertFalse(self.watcher.watching)
+        self.touch('a')
+        self.assertEqual((False, {}, set()), self.watcher.read_events())
+
+
 class TestPreview(NetrangerLocalTest):
     def test_NETRTogglePreview(self):
         #TODO